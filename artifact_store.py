@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+import joblib
+import numpy as np
+import sklearn
+from scipy import sparse
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestRegressor
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+PREPROCESSOR_FILE = "preprocessor.joblib"
+ESTIMATOR_FILE = "estimator.joblib"
+TREE_ARRAYS = ("roots", "children", "feature", "threshold", "value")
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def feature_schema(model):
+    """Vstupní sloupce modelu a jejich rozdělení na numerické / kategoriální."""
+    schema = {'features': [str(name) for name in getattr(model, 'feature_names_in_', [])]}
+    steps = model.named_steps.values() if hasattr(model, 'named_steps') else [model]
+    for step in steps:
+        if isinstance(step, ColumnTransformer):
+            for name, _, columns in step.transformers:
+                if name in ('num', 'cat'):
+                    schema['numeric' if name == 'num' else 'categorical'] = [str(col) for col in columns]
+    return schema
+
+
+def flatten_forest(forest):
+    """Převede stromy RandomForestRegressor na spojená plochá numpy pole.
+
+    children má tvar (uzly, 2) s levým a pravým potomkem, indexy jsou
+    posunuté o offset stromu; list má feature < 0 a potomky -1.
+    """
+    roots, left, right, feature, threshold, value = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        roots.append(offset)
+        left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(tree.feature)
+        threshold.append(tree.threshold)
+        value.append(tree.value[:, 0, 0])
+        offset += tree.node_count
+    return {
+        'roots': np.asarray(roots, dtype=np.int64),
+        'children': np.stack([np.concatenate(left), np.concatenate(right)], axis=1).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'value': np.concatenate(value).astype(np.float64),
+    }
+
+
+class FlatForest:
+    """Predikce lesa nad plochými (i memory-mapped) poli stromů."""
+
+    def __init__(self, arrays):
+        for name in TREE_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def _leaves(self, X):
+        """Index listu pro každou dvojici (řádek, strom), všechny stromy najednou."""
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        leaves = np.empty(n_rows * n_trees, dtype=np.int64)
+        nodes = np.tile(self.roots, n_rows)
+        positions = np.arange(n_rows * n_trees)
+        offsets = (positions // n_trees) * n_features
+        X_flat = X.ravel()
+
+        # V každém kroku se posunou jen dvojice, které ještě nejsou v listu
+        while nodes.size:
+            feature = self.feature[nodes]
+            is_leaf = feature < 0
+            if is_leaf.any():
+                leaves[positions[is_leaf]] = nodes[is_leaf]
+                keep = ~is_leaf
+                nodes, positions, offsets, feature = nodes[keep], positions[keep], offsets[keep], feature[keep]
+            go_right = X_flat[offsets + feature] > self.threshold[nodes]
+            nodes = self.children[nodes, go_right.view(np.int8)]
+
+        return leaves.reshape(n_rows, n_trees)
+
+    def predict(self, X):
+        if sparse.issparse(X):
+            X = X.toarray()
+        # Stromy sklearn porovnávají vstup ve float32
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.shape[0] == 0:
+            return np.empty(0)
+
+        # Inzeráty se často opakují se stejnými featurami, každá kombinace se projde jen jednou
+        row_keys = X.view(np.dtype((np.void, X.dtype.itemsize * X.shape[1]))).ravel()
+        _, first, inverse = np.unique(row_keys, return_index=True, return_inverse=True)
+        leaves = self._leaves(X[first])
+        return self.value[leaves].mean(axis=1)[inverse.ravel()]
+
+
+class ArtifactModel:
+    """Model načtený z úložiště artefaktů, rozhraní jako Pipeline.predict."""
+
+    def __init__(self, manifest, preprocessor, estimator):
+        self.manifest = manifest
+        self.preprocessor = preprocessor
+        self.estimator = estimator
+        self.feature_names_in_ = np.array(manifest['schema']['features'], dtype=object)
+        self.named_steps = getattr(preprocessor, 'named_steps', {})
+
+    def predict(self, X):
+        return self.estimator.predict(self.preprocessor.transform(X))
+
+
+def next_version_dir(root):
+    """Adresář pro další verzi artefaktu (root/v1, root/v2, ...)."""
+    versions = [int(name[1:]) for name in os.listdir(root) if name.startswith("v") and name[1:].isdigit()] if os.path.isdir(root) else []
+    return os.path.join(root, f"v{max(versions, default=0) + 1}")
+
+
+def latest_version_dir(root):
+    versions = [int(name[1:]) for name in os.listdir(root) if name.startswith("v") and name[1:].isdigit()]
+    if not versions:
+        raise FileNotFoundError(f"V {root} není žádná verze modelu")
+    return os.path.join(root, f"v{max(versions)}")
+
+
+def save_artifact(model, root, source=None):
+    """Uloží Pipeline(preprocessing..., estimator) jako novou verzi artefaktu.
+
+    Náhodný les se uloží jako plochá .npy pole, která si worker procesy
+    memory-mapují a sdílejí přes page cache; ostatní estimátory jako joblib.
+    """
+    path = next_version_dir(root)
+    os.makedirs(path)
+
+    preprocessor, estimator = model[:-1], model[-1]
+    joblib.dump(preprocessor, os.path.join(path, PREPROCESSOR_FILE))
+
+    files = [PREPROCESSOR_FILE]
+    if isinstance(estimator, RandomForestRegressor) and estimator.n_outputs_ == 1:
+        kind = "flat_forest"
+        for name, array in flatten_forest(estimator).items():
+            np.save(os.path.join(path, f"{name}.npy"), array)
+            files.append(f"{name}.npy")
+    else:
+        kind = "joblib"
+        joblib.dump(estimator, os.path.join(path, ESTIMATOR_FILE))
+        files.append(ESTIMATOR_FILE)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'version': int(os.path.basename(path)[1:]),
+        'created_at': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'source': source,
+        'sklearn_version': sklearn.__version__,
+        'estimator': type(estimator).__name__,
+        'kind': kind,
+        'schema': feature_schema(model),
+        'checksums': {name: _sha256(os.path.join(path, name)) for name in files},
+    }
+    with open(os.path.join(path, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return path
+
+
+def load_artifact(path, verify=True, mmap=True):
+    """Načte artefakt; `path` je adresář verze nebo kořen (vezme se nejnovější verze).
+
+    S verify=True se ověří SHA-256 všech souborů proti manifestu.
+    """
+    if not os.path.exists(os.path.join(path, MANIFEST)):
+        path = latest_version_dir(path)
+    with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest['format_version'] != FORMAT_VERSION:
+        raise ValueError(f"Nepodporovaná verze formátu artefaktu: {manifest['format_version']}")
+    if verify:
+        for name, checksum in manifest['checksums'].items():
+            if _sha256(os.path.join(path, name)) != checksum:
+                raise ValueError(f"Kontrolní součet nesouhlasí: {name}")
+
+    preprocessor = joblib.load(os.path.join(path, PREPROCESSOR_FILE))
+    mmap_mode = "r" if mmap else None
+    if manifest['kind'] == "flat_forest":
+        estimator = FlatForest({name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in TREE_ARRAYS})
+    else:
+        estimator = joblib.load(os.path.join(path, ESTIMATOR_FILE), mmap_mode=mmap_mode)
+    return ArtifactModel(manifest, preprocessor, estimator)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verzované úložiště artefaktů modelu")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Převede pickle modelu na novou verzi artefaktu")
+    export_parser.add_argument("--model", default="bike_price_predictor.pkl")
+    export_parser.add_argument("--root", default="models/bike_price_predictor")
+
+    info_parser = subparsers.add_parser("info", help="Vypíše manifest verze")
+    info_parser.add_argument("path", nargs="?", default="models/bike_price_predictor")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        path = save_artifact(joblib.load(args.model), args.root, source=os.path.basename(args.model))
+        print(f"Artefakt uložen do {path}")
+    else:
+        print(json.dumps(load_artifact(args.path, verify=True).manifest, indent=2))
@@ -0,0 +1,177 @@
+import ssl
+import zlib
+from urllib.parse import urlsplit, urljoin
+import h11
+import trio
+from html_scraper import USER_AGENT
+
+MAX_REDIRECTS = 5
+
+
+class _Connection:
+    """Jedno HTTP/1.1 spojení řízené přes h11."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.h11 = h11.Connection(our_role=h11.CLIENT)
+
+    async def _send(self, event):
+        data = self.h11.send(event)
+        if data:
+            await self.stream.send_all(data)
+
+    async def request(self, host, target):
+        await self._send(h11.Request(method="GET", target=target, headers=[
+            ("Host", host),
+            ("User-Agent", USER_AGENT),
+            ("Accept", "text/html,application/xhtml+xml"),
+            ("Accept-Encoding", "gzip"),
+            ("Connection", "keep-alive"),
+        ]))
+        await self._send(h11.EndOfMessage())
+
+        response = None
+        body = []
+        while True:
+            event = self.h11.next_event()
+            if event is h11.NEED_DATA:
+                self.h11.receive_data(await self.stream.receive_some(65536))
+                continue
+            if isinstance(event, h11.Response):
+                response = event
+            elif isinstance(event, h11.Data):
+                body.append(event.data)
+            elif isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                break
+
+        if response is None:
+            raise h11.RemoteProtocolError("Spojení bylo uzavřeno před odpovědí")
+
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in response.headers}
+        return response.status_code, headers, b"".join(body)
+
+    def reusable(self):
+        return self.h11.our_state is h11.DONE and self.h11.their_state is h11.DONE
+
+    def start_next_cycle(self):
+        self.h11.start_next_cycle()
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+class AsyncFetcher:
+    """Asynchronní HTTP klient s keep-alive poolem spojení pro každý host."""
+
+    def __init__(self):
+        self._idle = {}
+        self._ssl_context = ssl.create_default_context()
+
+    async def _open(self, scheme, host, port):
+        if scheme == "https":
+            stream = await trio.open_ssl_over_tcp_stream(
+                host, port, ssl_context=self._ssl_context, https_compatible=True
+            )
+        else:
+            stream = await trio.open_tcp_stream(host, port)
+        return _Connection(stream)
+
+    async def _request_once(self, url):
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        idle = self._idle.setdefault(key, [])
+        reused = bool(idle)
+        conn = idle.pop() if idle else await self._open(*key)
+
+        try:
+            status, headers, body = await conn.request(parts.netloc, target)
+        except (h11.RemoteProtocolError, trio.BrokenResourceError, trio.ClosedResourceError, OSError):
+            await conn.aclose()
+            if not reused:
+                raise
+            # Keep-alive spojení mezitím server zavřel, zkus nové
+            conn = await self._open(*key)
+            status, headers, body = await conn.request(parts.netloc, target)
+        except BaseException:
+            # Zrušení nebo timeout uprostřed odpovědi, spojení nejde znovu použít
+            await trio.aclose_forcefully(conn.stream)
+            raise
+
+        if conn.reusable():
+            conn.start_next_cycle()
+            idle.append(conn)
+        else:
+            await conn.aclose()
+
+        if headers.get("content-encoding") == "gzip":
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        return status, headers, body
+
+    async def get(self, url):
+        """Stáhne URL (s přesměrováním) a vrátí (status, hlavičky, tělo)."""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await self._request_once(url)
+            if status in (301, 302, 303, 307, 308) and "location" in headers:
+                url = urljoin(url, headers["location"])
+                continue
+            return status, headers, body
+        raise h11.RemoteProtocolError(f"Příliš mnoho přesměrování: {url}")
+
+    async def aclose(self):
+        for connections in self._idle.values():
+            for conn in connections:
+                await trio.aclose_forcefully(conn.stream)
+        self._idle.clear()
+
+
+def decode_body(headers, body):
+    """Dekóduje tělo odpovědi podle charsetu z Content-Type."""
+    charset = "utf-8"
+    content_type = headers.get("content-type", "")
+    if "charset=" in content_type:
+        charset = content_type.split("charset=")[-1].split(";")[0].strip()
+    return body.decode(charset, errors="replace")
+
+
+async def crawl(urls, handle_page, handle_error=None, concurrency=200, timeout=30):
+    """Stáhne všechny URL s nejvýše `concurrency` rozpracovanými požadavky.
+
+    handle_page(url, status, html) a handle_error(url, exc) se volají
+    v hlavním vlákně trio, takže mohou bez zámku zapisovat do CSV.
+    """
+    fetcher = AsyncFetcher()
+    send_channel, receive_channel = trio.open_memory_channel(concurrency)
+
+    async def worker(receive):
+        async with receive:
+            async for url in receive:
+                try:
+                    with trio.fail_after(timeout):
+                        status, headers, body = await fetcher.get(url)
+                    handle_page(url, status, decode_body(headers, body))
+                except Exception as e:
+                    if handle_error is not None:
+                        handle_error(url, e)
+                    else:
+                        print(f"Chyba při stahování {url}: {str(e)}")
+
+    try:
+        async with trio.open_nursery() as nursery:
+            async with receive_channel:
+                for _ in range(concurrency):
+                    nursery.start_soon(worker, receive_channel.clone())
+            async with send_channel:
+                for url in urls:
+                    await send_channel.send(url)
+    finally:
+        await fetcher.aclose()
+
+
+def run_crawl(urls, handle_page, handle_error=None, concurrency=200, timeout=30):
+    """Synchronní obal nad crawl() pro volání ze skriptů."""
+    trio.run(crawl, urls, handle_page, handle_error, concurrency, timeout)
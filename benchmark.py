@@ -0,0 +1,706 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures")
+LISTINGS_CSV = os.path.join(BASE_DIR, "spoj_updated.csv")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Lokální náhrada mtbdatabase.com s nahranými stránkami.
+
+    /bikes/ vrací výpis, ostatní GET cesty stránku produktu a POST na
+    /1/indexes/<index>/query odpovídá jako vyhledávací index
+    (bikes_per_style hitů pro každý styl jízdy).
+    Stránky produktů umí simulovat přetížení: náhodné 429 s pravděpodobností
+    error_rate a 503, když souběžně běží víc než capacity požadavků.
+    """
+
+    protocol_version = "HTTP/1.1"  # keep-alive jako u skutečného webu
+    page = b""
+    listing = b""
+    bikes_per_style = 0
+    latency = 0.0
+    error_rate = 0.0
+    capacity = None
+    in_flight = None  # [počet] sdílený všemi požadavky jednoho serveru
+    lock = None
+
+    def _send(self, body, content_type, status=200):
+        if self.latency:
+            time.sleep(self.latency)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/") == "/bikes":
+            self._send(self.listing, "text/html; charset=utf-8")
+            return
+
+        with self.lock:
+            self.in_flight[0] += 1
+            overloaded = self.capacity is not None and self.in_flight[0] > self.capacity
+        try:
+            if overloaded:
+                self._send(b"Service Unavailable", "text/plain", status=503)
+            elif self.error_rate and random.random() < self.error_rate:
+                self._send(b"Too Many Requests", "text/plain", status=429)
+            else:
+                self._send(self.page, "text/html; charset=utf-8")
+        finally:
+            with self.lock:
+                self.in_flight[0] -= 1
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not re.match(r"^/1/indexes/[^/]+/query$", self.path):
+            self.send_error(404)
+            return
+        style = "-".join(value.split(":", 1)[1] for group in query.get("facetFilters", []) for value in group) or "all"
+        page, per_page = query.get("page", 0), query.get("hitsPerPage", 20)
+        first, last = page * per_page, min((page + 1) * per_page, self.bikes_per_style)
+        hits = [{"url": f"/bikes/2023/ibis/{style}/2023-ibis-{style}-{i}/"} for i in range(first, last)]
+        body = json.dumps({"hits": hits, "page": page, "nbPages": -(-self.bikes_per_style // per_page)}).encode("utf-8")
+        self._send(body, "application/json")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    """HTTP server s uloženými stránkami běžící ve vlákně na pozadí."""
+
+    def __init__(self, page_file="product_page.html", latency=0.0, listing_file="listing_page.html", bikes_per_style=250,
+                 error_rate=0.0, capacity=None):
+        with open(os.path.join(FIXTURES_DIR, page_file), "rb") as f:
+            page = f.read()
+        with open(os.path.join(FIXTURES_DIR, listing_file), "rb") as f:
+            listing = f.read()
+        handler = type("Handler", (FixtureHandler,), {
+            "page": page, "listing": listing, "bikes_per_style": bikes_per_style, "latency": latency,
+            "error_rate": error_rate, "capacity": capacity, "in_flight": [0], "lock": threading.Lock(),
+        })
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def product_urls(self, count):
+        return [f"{self.base_url}/bikes/2023/ibis/exie/2023-ibis-exie-{i}/" for i in range(count)]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def bench_discovery(server, hits_per_page=100):
+    """Hledání URL kol přes výpis a vyhledávací index (url_crawler --source search)."""
+    from url_crawler import discover_via_search
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        links = list(discover_via_search(f"{server.base_url}/bikes/", endpoint=server.base_url, hits_per_page=hits_per_page))
+    return len(links), time.perf_counter() - start
+
+
+def bench_threadpool(urls, workers=5, scraper="craw2", rate_control=None):
+    """Fast path přes requests.Session ve ThreadPoolExecutor (crawler/craw2 --mode http).
+
+    S rate_control běží jako craw2 --adaptive; neúspěšné stránky se počítají jako None.
+    """
+    from html_scraper import create_session
+
+    scrape_page_http = importlib.import_module(scraper).scrape_page_http
+    if rate_control is not None:
+        workers = max(workers, rate_control.concurrency.maximum)
+    session = create_session(pool_size=workers)
+
+    def scrape(url):
+        try:
+            if rate_control is not None:
+                return rate_control.call(lambda u: scrape_page_http(u, session), url)
+            return scrape_page_http(url, session)
+        except Exception:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scrape, urls))
+    elapsed = time.perf_counter() - start
+    return sum(r is not None for r in results), elapsed
+
+
+def bench_process_urls(urls, mode="http", workers=5, concurrency=200, parse_processes=0):
+    """Celá cesta craw2.process_urls jako v CLI: pipeline, jeden zapisovač, případně pool parsování.
+
+    Vrací (zapsané řádky, čas); vstupní i výstupní CSV leží v dočasném adresáři.
+    """
+    import csv
+    from craw2 import process_urls
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "urls.csv")
+        output_file = os.path.join(tmp_dir, "scraped.csv")
+        with open(input_file, "w", newline="", encoding="utf-8") as f:
+            f.write("URL\n" + "\n".join(urls) + "\n")
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            process_urls(input_file, output_file, mode=mode, max_workers=workers, concurrency=concurrency,
+                         parse_processes=parse_processes)
+        elapsed = time.perf_counter() - start
+        with open(output_file, newline="", encoding="utf-8") as f:
+            rows = sum(1 for _ in csv.DictReader(f))
+    return rows, elapsed
+
+
+def fixture_spec_rows(page_file="product_page.html"):
+    """Řádky specifikací (label, value) z uložené stránky."""
+    from html_scraper import parse_product_html
+
+    with open(os.path.join(FIXTURES_DIR, page_file), encoding="utf-8") as f:
+        return parse_product_html(f.read())['specs']
+
+
+def bench_spec_extraction(rows, repeat=20000):
+    """Řádky specifikací za sekundu: dávkové extract_specs, po řádcích a parse_suspension."""
+    from spec_extract import extract_specs, parse_suspension
+
+    batch = rows * repeat
+    rates = {}
+    for name, func in (
+        ("extract_specs_batch", lambda: extract_specs(batch)),
+        ("extract_specs_row", lambda: [extract_specs([row]) for row in batch]),
+        ("parse_suspension", lambda: [parse_suspension(label, value) for label, value in batch]),
+    ):
+        start = time.perf_counter()
+        func()
+        rates[name] = len(batch) / (time.perf_counter() - start)
+    return rates
+
+
+def saved_pages(count, cache_dir=None, page_file="product_page.html"):
+    """count dvojic (url, HTML jako bytes) z uložených stránek, opakovaných dokola.
+
+    Bere fixture stránku produktu a s cache_dir i všechny stránky z HtmlCache.
+    """
+    from html_cache import HtmlCache
+
+    with open(os.path.join(FIXTURES_DIR, page_file), "rb") as f:
+        pages = [("https://mtbdatabase.com/bikes/2023/ibis/exie-deore/", f.read())]
+    if cache_dir and os.path.isdir(cache_dir):
+        cache = HtmlCache(cache_dir)
+        try:
+            pages += list(cache.iter_pages(raw=True))
+        finally:
+            cache.close()
+    return [pages[i % len(pages)] for i in range(count)]
+
+
+def bench_parse(pages, processes=(1, 2, 4)):
+    """Stránky/s parsování HTML: celý strom, SoupStrainer a SoupStrainer v ProcessPoolExecutor.
+
+    Pool se spouští před měřením, start procesů se do času nepočítá.
+    """
+    from html_scraper import PRODUCT_STRAINER, parse_product_html
+    from craw2 import parse_pages, start_parse_executor
+
+    rates = {}
+    for name, strainer in (("full_tree", None), ("strainer", PRODUCT_STRAINER)):
+        start = time.perf_counter()
+        for _, html in pages:
+            parse_product_html(html, strainer=strainer)
+        rates[name] = len(pages) / (time.perf_counter() - start)
+
+    for count in processes:
+        with start_parse_executor(count) as executor:
+            list(parse_pages(pages[:4 * count], executor, chunksize=1))
+            start = time.perf_counter()
+            parsed = list(parse_pages(pages, executor))
+            rates[f"pool_{count}"] = len(parsed) / (time.perf_counter() - start)
+    return rates
+
+
+def scaled_listing_csv(factor, directory):
+    """Syntetický CSV s inzeráty: spoj_updated.csv zopakovaný factor-krát."""
+    path = os.path.join(directory, f"listings_{factor}x.csv")
+    if os.path.exists(path):
+        return path
+    with open(LISTINGS_CSV, encoding="utf-8") as src:
+        header = src.readline()
+        body = src.read()
+    if not body.endswith("\n"):
+        body += "\n"
+    with open(path, "w", encoding="utf-8") as dst:
+        dst.write(header)
+        for _ in range(factor):
+            dst.write(body)
+    return path
+
+
+REPOST_SUFFIXES = ["like new", "price drop", "reduced", "obo", "mint", "must go"]
+
+
+def inflated_listings_csv(factor, directory, seed=0):
+    """Syntetický CSV s re-posty: každý inzerát spoj_updated.csv factor-krát.
+
+    Kopie mají nové ID v URL, upravený titulek (přípona, velikost písmen)
+    a cenu o 0-15 % nižší, jako když prodejce inzerát vystaví znovu.
+    """
+    import numpy as np
+    import pandas as pd
+
+    path = os.path.join(directory, f"reposts_{factor}x.csv")
+    if os.path.exists(path):
+        return path
+    base = pd.read_csv(LISTINGS_CSV)
+    rng = np.random.default_rng(seed)
+    copies = [base]
+    for copy in range(1, factor):
+        df = base.copy()
+        suffixed = rng.random(len(df)) < 0.5
+        suffixes = rng.choice(REPOST_SUFFIXES, size=len(df))
+        df.loc[suffixed, 'title'] = df.loc[suffixed, 'title'] + " " + suffixes[suffixed]
+        upper = rng.random(len(df)) < 0.2
+        df.loc[upper, 'title'] = df.loc[upper, 'title'].str.upper()
+        df['price'] = (df['price'] * rng.uniform(0.85, 1.0, size=len(df))).round()
+        df['url'] = df['url'].str.replace(r'/(\d+)/$', lambda m: f"/{int(m.group(1)) + copy * 10_000_000}/", regex=True)
+        copies.append(df)
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def bench_dedup(path):
+    """Řádky/s deduplikace a počet kandidátních párů proti porovnání všech dvojic."""
+    import pandas as pd
+    from dedup import dedup_listings
+
+    df = pd.read_csv(path)
+    stats = {}
+    start = time.perf_counter()
+    dedup_listings(df, stats=stats)
+    seconds = time.perf_counter() - start
+    rows = stats['rows_in']
+    return {
+        **stats,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows / seconds, 1),
+        'all_pairs': rows * (rows - 1) // 2,
+    }
+
+
+def bench_entity_resolution(path, specs_path=os.path.join(BASE_DIR, "scraped.csv")):
+    """Inzeráty/s při párování se specifikacemi (včetně stavby indexu)."""
+    import pandas as pd
+    from entity_resolution import join_specs
+    from ingest import load_specs
+
+    listings = pd.read_csv(path)
+    specs = load_specs(specs_path)
+    stats = {}
+    join_specs(listings, specs, stats=stats)
+    return stats
+
+
+def load_and_preprocess_apply(filepath):
+    """Původní verze main.load_and_preprocess s .apply po řádcích (referenční)."""
+    import numpy as np
+    import pandas as pd
+
+    df = pd.read_csv(filepath)
+    df = df[(df['price'] > 100) & (df['price'] < 5000)]
+    for col in ['type', 'material']:
+        df[col] = df[col].fillna('missing').astype(str)
+    df['condition'] = df['condition'].clip(1, 5)
+    df['suspension_type'] = np.where(df['rear_travel'].fillna(0) > 0, 'full', 'hardtail')
+    df['year'] = df['title'].str.extract(r'(\d{4})').astype(float)
+    df['age'] = 2025 - df['year'].fillna(2020)
+    df['wheel_size'] = df['wheel_size'].astype(str).apply(
+        lambda x: re.findall(r'\d+\.?\d*', x)[0] if re.findall(r'\d+\.?\d*', x) else np.nan
+    ).astype(float)
+    df['wheel_size'] = df['wheel_size'].fillna(df['wheel_size'].median())
+    return df.drop(['title', 'url', 'year'], axis=1).dropna(subset=['frame_size', 'wheel_size'])
+
+
+def bench_preprocess(path, chunksize=100_000):
+    """Řádky/s pro původní .apply verzi, vektorovou verzi a chunked režim."""
+    from main import load_and_preprocess
+
+    with open(path, encoding="utf-8") as f:
+        rows = sum(1 for _ in f) - 1
+
+    rates = {}
+    for name, func in (
+        ("apply", lambda: load_and_preprocess_apply(path)),
+        ("vectorized", lambda: load_and_preprocess(path)),
+        ("chunked", lambda: load_and_preprocess(path, chunksize=chunksize)),
+    ):
+        start = time.perf_counter()
+        func()
+        rates[name] = rows / (time.perf_counter() - start)
+    return rates
+
+
+def bench_predict(model, rows, single_repeats=200, batch_size=1000, batch_repeats=5):
+    """Latence predikce jednoho řádku (p50/p99) a celé dávky."""
+    import numpy as np
+    import pandas as pd
+    from predict import FeaturePreparer, predict_frame
+
+    prepare = FeaturePreparer(model)
+    latencies = []
+    for i in range(single_repeats):
+        start = time.perf_counter()
+        predict_frame(model, prepare, pd.DataFrame([rows[i % len(rows)]]))
+        latencies.append(time.perf_counter() - start)
+
+    batch = pd.DataFrame([rows[i % len(rows)] for i in range(batch_size)])
+    batch_times = []
+    for _ in range(batch_repeats):
+        start = time.perf_counter()
+        predict_frame(model, prepare, batch)
+        batch_times.append(time.perf_counter() - start)
+    batch_seconds = min(batch_times)
+
+    return {
+        'single_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'single_p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'batch_rows': batch_size,
+        'batch_ms': round(batch_seconds * 1000, 3),
+        'batch_rows_per_sec': round(batch_size / batch_seconds, 1),
+    }
+
+
+def bench_comparables(path, queries=1000, k=5, add_rows=1000):
+    """Stavba indexu srovnatelných inzerátů, latence dotazu (p50/p99) a přidání nových řádků."""
+    import numpy as np
+    import pandas as pd
+    from comparables import ComparablesIndex, FEATURES
+    from main import preprocess_frame
+
+    raw = pd.read_csv(path)
+    # Zopakované kopie spoj_updated.csv mají stejné URL, index by je sloučil
+    raw['url'] = raw['url'].astype(str) + "#" + raw.index.astype(str)
+    base, new = raw.iloc[:-add_rows], raw.iloc[-add_rows:]
+
+    start = time.perf_counter()
+    index = ComparablesIndex().fit(base)
+    build_seconds = time.perf_counter() - start
+
+    rows = preprocess_frame(base.head(queries), index.wheel_size_median)[FEATURES].to_dict("records")
+    latencies = []
+    for i in range(queries):
+        start = time.perf_counter()
+        index.query(rows[i % len(rows)], k=k)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index.add(new)
+    add_seconds = time.perf_counter() - start
+
+    return {
+        'rows': len(index.X),
+        'build_s': round(build_seconds, 3),
+        'query_p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+        'query_p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+        'add_rows': add_rows,
+        'add_ms': round(add_seconds * 1000, 3),
+        'rebuilt': index.tree_size == len(index.X),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _numeric_leaves(results, prefix=""):
+    """Ploché {cesta: číslo} ze zanořených výsledků (pro porovnání běhů)."""
+    leaves = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            leaves.update(_numeric_leaves(value, path + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            leaves[path] = value
+    return leaves
+
+
+def compare_results(baseline, current):
+    """Vypíše změnu každé metriky proti předchozímu běhu."""
+    before = _numeric_leaves({k: v for k, v in baseline.items() if k != 'params'})
+    after = _numeric_leaves({k: v for k, v in current.items() if k != 'params'})
+    for path in sorted(before.keys() & after.keys()):
+        if before[path]:
+            print(f"{path}: {before[path]:,.3f} -> {after[path]:,.3f} ({(after[path] / before[path] - 1) * 100:+.1f} %)")
+
+
+def _memory_usage():
+    """RSS a soukromá (nesdílená) paměť procesu v MB ze /proc/self/smaps_rollup."""
+    usage = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Clean:", "Private_Dirty:"):
+                usage[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(usage.get("Rss", 0), 1),
+        'pss_mb': round(usage.get("Pss", 0), 1),
+        'private_mb': round(usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0), 1),
+    }
+
+
+def _model_load_worker(kind, path, rows, ready, done, results):
+    import pandas as pd
+    from predict import load_model
+
+    baseline = _memory_usage()
+    start = time.perf_counter()
+    model = load_model(path)
+    load_seconds = time.perf_counter() - start
+    model.predict(pd.DataFrame(rows))
+
+    ready.wait()  # Paměť se měří, až jsou všechny procesy načtené
+    usage = _memory_usage()
+    results.put({
+        'kind': kind,
+        'load_ms': round(load_seconds * 1000, 2),
+        'rss_mb': round(usage['rss_mb'] - baseline['rss_mb'], 1),
+        'pss_mb': round(usage['pss_mb'] - baseline['pss_mb'], 1),
+        'private_mb': round(usage['private_mb'] - baseline['private_mb'], 1),
+    })
+    done.wait()
+
+
+def bench_model_load(kind, path, rows, processes=4):
+    """Doba načtení a paměť na proces pro `processes` souběžných workerů."""
+    ctx = multiprocessing.get_context("spawn")
+    ready, done, results = ctx.Barrier(processes + 1), ctx.Event(), ctx.Queue()
+    workers = [ctx.Process(target=_model_load_worker, args=(kind, path, rows, ready, done, results)) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    ready.wait()
+    measured = [results.get() for _ in workers]
+    done.set()
+    for worker in workers:
+        worker.join()
+
+    return {
+        'kind': kind,
+        'processes': processes,
+        'load_ms': max(m['load_ms'] for m in measured),
+        'rss_mb_per_process': max(m['rss_mb'] for m in measured),
+        'pss_mb_per_process': max(m['pss_mb'] for m in measured),
+        'private_mb_per_process': max(m['private_mb'] for m in measured),
+    }
+
+
+def bench_rate_control(urls_factory, workers=5, max_concurrency=64, host_rate=1000.0, **server_options):
+    """Pevný počet vláken bez opakování vs. adaptivní řízení proti přetěžovanému stubu."""
+    from rate_control import RateController, AdaptiveConcurrency, HostRateLimiter
+
+    results = {}
+    for name in ("fixed", "adaptive"):
+        rate_control = None
+        if name == "adaptive":
+            rate_control = RateController(
+                AdaptiveConcurrency(initial=workers, maximum=max_concurrency, latency_target=1.0, window=10),
+                HostRateLimiter(rate=host_rate), backoff_base=0.05, backoff_cap=1.0, retries=5,
+            )
+        with FixtureServer(**server_options) as server:
+            urls = urls_factory(server)
+            ok, elapsed = bench_threadpool(urls, workers=workers, rate_control=rate_control)
+        results[name] = {'pages': ok, 'of': len(urls), 'pages_per_sec': round(ok / elapsed, 1)}
+        if rate_control is not None:
+            summary = rate_control.summary()
+            results[name].update({key: summary.get(key, 0) for key in ('limit', 'retries', 'overloads')})
+    return results
+
+
+SECTIONS = ("model_load", "predict", "preprocess", "spec_extraction", "discovery", "crawl", "rate_control", "comparables", "dedup", "entity_resolution", "startup", "parse")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline benchmark hledání, scrapování, parsování, předzpracování a predikce")
+    parser.add_argument("--sections", nargs="+", choices=SECTIONS, default=list(SECTIONS))
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="Umělá latence serveru v sekundách")
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--crawl-parse-processes", type=int, default=2, help="Procesy parsování pro craw2 http v sekci crawl (0 = neměřit)")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="Podíl odpovědí 429 ze stubu v sekci rate_control")
+    parser.add_argument("--capacity", type=int, default=32, help="Souběžné požadavky, nad které stub vrací 503 (sekce rate_control)")
+    parser.add_argument("--bikes-per-style", type=int, default=250, help="Počet hitů vyhledávacího indexu na styl jízdy")
+    parser.add_argument("--spec-repeat", type=int, default=20000, help="Kolikrát zopakovat řádky fixture stránky v benchmarku extrakce")
+    parser.add_argument("--preprocess-scales", type=int, nargs="+", default=[1, 10, 100], help="Násobky spoj_updated.csv pro benchmark předzpracování")
+    parser.add_argument("--comparables-scales", type=int, nargs="+", default=[1, 10, 100], help="Násobky spoj_updated.csv pro benchmark indexu srovnatelných inzerátů")
+    parser.add_argument("--dedup-scales", type=int, nargs="+", default=[1, 10, 100], help="Kolikrát re-postovat každý inzerát v benchmarku deduplikace a párování se specifikacemi")
+    parser.add_argument("--parse-pages", type=int, default=5000, help="Počet uložených stránek v benchmarku parsování")
+    parser.add_argument("--parse-processes", type=int, nargs="+", default=sorted({1, 2, 4, os.cpu_count()}), help="Velikosti poolu procesů v benchmarku parsování")
+    parser.add_argument("--html-cache", default=os.path.join(BASE_DIR, "html_cache"), help="HtmlCache se staženými stránkami pro benchmark parsování (pokud existuje)")
+    parser.add_argument("--model", default=os.path.join(BASE_DIR, "bike_price_predictor.pkl"))
+    parser.add_argument("--model-processes", type=int, default=4, help="Počet procesů pro měření načítání modelu")
+    parser.add_argument("--output", default=os.path.join(BASE_DIR, "benchmark_results.json"), help="JSON s výsledky běhu")
+    parser.add_argument("--compare", help="JSON z předchozího běhu pro porovnání")
+    args = parser.parse_args()
+
+    results = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'params': vars(args),
+    }
+
+    if "model_load" in args.sections or "predict" in args.sections:
+        import joblib
+        import pandas as pd
+        from artifact_store import save_artifact
+        from predict import FeaturePreparer, load_model
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model = joblib.load(args.model)
+            artifact_dir = save_artifact(model, os.path.join(tmp_dir, "model"))
+            rows = FeaturePreparer(model)(pd.read_csv(os.path.join(BASE_DIR, "scraped.csv"), nrows=100)).to_dict("records")
+            models = (("pickle", args.model), ("artifact", artifact_dir))
+
+            if "model_load" in args.sections:
+                results['model_load'] = {}
+                for kind, path in models:
+                    result = bench_model_load(kind, path, rows, processes=args.model_processes)
+                    results['model_load'][kind] = result
+                    print(f"načtení modelu ({kind}, {result['processes']} procesů): {result['load_ms']} ms, "
+                          f"RSS {result['rss_mb_per_process']} MB, soukromá paměť {result['private_mb_per_process']} MB na proces")
+
+            if "predict" in args.sections:
+                results['predict'] = {}
+                for kind, path in models:
+                    result = bench_predict(load_model(path), rows)
+                    results['predict'][kind] = result
+                    print(f"predikce ({kind}): 1 řádek p50 {result['single_p50_ms']} ms / p99 {result['single_p99_ms']} ms, "
+                          f"dávka {result['batch_rows']} řádků {result['batch_ms']} ms ({result['batch_rows_per_sec']:,.0f} řádků/s)")
+
+    if "preprocess" in args.sections:
+        results['preprocess'] = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for scale in args.preprocess_scales:
+                rates = bench_preprocess(scaled_listing_csv(scale, tmp_dir))
+                results['preprocess'][f"{scale}x"] = {f"{name}_rows_per_sec": round(rate, 1) for name, rate in rates.items()}
+                print(f"load_and_preprocess {scale}x: " + ", ".join(f"{name} {rate:,.0f} řádků/s" for name, rate in rates.items()))
+
+    if "spec_extraction" in args.sections:
+        rates = bench_spec_extraction(fixture_spec_rows(), repeat=args.spec_repeat)
+        results['spec_extraction'] = {f"{name}_rows_per_sec": round(rate, 1) for name, rate in rates.items()}
+        print("specifikace: " + ", ".join(f"{name} {rate:,.0f} řádků/s" for name, rate in rates.items()))
+
+    if "discovery" in args.sections or "crawl" in args.sections:
+        with FixtureServer(latency=args.latency, bikes_per_style=args.bikes_per_style) as server:
+            if "discovery" in args.sections:
+                found, elapsed = bench_discovery(server)
+                results['discovery'] = {'urls': found, 'seconds': round(elapsed, 3), 'urls_per_sec': round(found / elapsed, 1)}
+                print(f"hledání URL (vyhledávací index): {found} URL, {found / elapsed:,.0f} URL/s")
+
+            if "crawl" in args.sections:
+                urls = server.product_urls(args.pages)
+                results['crawl'] = {}
+                # Rychlost počítá jen zapsané stránky, chybné (len(urls) - ok) se vykazují zvlášť
+                ok, elapsed = bench_threadpool(urls, workers=args.workers, scraper="crawler")
+                results['crawl']['crawler_http'] = {'pages': ok, 'errors': len(urls) - ok, 'pages_per_sec': round(ok / elapsed, 1)}
+                print(f"crawler http ({args.workers} vláken): {ok}/{len(urls)} stránek, {len(urls) - ok} chyb, {ok / elapsed:.1f} stránek/s")
+
+                # craw2 se měří přes process_urls, tedy stejnou cestou, jakou běží jeho CLI
+                runs = [("craw2_http", "http", 0, f"{args.workers} vláken"),
+                        ("craw2_async", "async", 0, f"{args.concurrency} souběžně")]
+                if args.crawl_parse_processes:
+                    runs.insert(1, ("craw2_http_parse_pool", "http", args.crawl_parse_processes,
+                                    f"{args.workers} vláken, {args.crawl_parse_processes} procesů parsování"))
+                for name, mode, parse_processes, label in runs:
+                    ok, elapsed = bench_process_urls(urls, mode, workers=args.workers, concurrency=args.concurrency,
+                                                     parse_processes=parse_processes)
+                    results['crawl'][name] = {'pages': ok, 'errors': len(urls) - ok, 'pages_per_sec': round(ok / elapsed, 1)}
+                    print(f"craw2 process_urls {mode} ({label}): {ok}/{len(urls)} stránek, {len(urls) - ok} chyb, {ok / elapsed:.1f} stránek/s")
+
+    if "rate_control" in args.sections:
+        results['rate_control'] = bench_rate_control(
+            lambda server: server.product_urls(args.pages), workers=args.workers,
+            latency=args.latency, error_rate=args.error_rate, capacity=args.capacity,
+        )
+        for name, result in results['rate_control'].items():
+            print(f"řízení rychlosti ({name}): {result['pages']}/{result['of']} stránek, {result['pages_per_sec']} stránek/s"
+                  + (f", limit {result['limit']}, {result['retries']} opakování" if name == "adaptive" else ""))
+
+    if "comparables" in args.sections:
+        results['comparables'] = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for scale in args.comparables_scales:
+                result = bench_comparables(scaled_listing_csv(scale, tmp_dir))
+                results['comparables'][f"{scale}x"] = result
+                print(f"srovnatelné inzeráty {scale}x ({result['rows']} řádků): stavba {result['build_s']} s, "
+                      f"dotaz p50 {result['query_p50_ms']} ms / p99 {result['query_p99_ms']} ms, "
+                      f"přidání {result['add_rows']} řádků {result['add_ms']} ms")
+
+    if "dedup" in args.sections:
+        results['dedup'] = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for scale in args.dedup_scales:
+                result = bench_dedup(inflated_listings_csv(scale, tmp_dir))
+                results['dedup'][f"{scale}x"] = result
+                print(f"deduplikace {scale}x: {result['rows_in']} -> {result['rows_out']} řádků, {result['seconds']} s "
+                      f"({result['rows_per_sec']:,.0f} řádků/s), {result['candidate_pairs']:,} kandidátních párů "
+                      f"z {result['all_pairs']:,} všech dvojic")
+
+    if "entity_resolution" in args.sections:
+        results['entity_resolution'] = {}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for scale in args.dedup_scales:
+                result = bench_entity_resolution(inflated_listings_csv(scale, tmp_dir))
+                results['entity_resolution'][f"{scale}x"] = result
+                print(f"párování se specifikacemi {scale}x: {result['matched']}/{result['listings']} inzerátů "
+                      f"({result['unique_titles']} unikátních titulků), {result['listings_per_sec']:,.0f} inzerátů/s, "
+                      f"{result['scored_pairs']:,} skórovaných párů místo {result['cross_product']:,}")
+
+    if "startup" in args.sections:
+        from bikeest import measure_startup
+        results['startup_ms'] = measure_startup()
+        print("start podpříkazů bikeest: " + ", ".join(f"{name} {ms} ms" for name, ms in results['startup_ms'].items()))
+
+    if "parse" in args.sections:
+        pages = saved_pages(args.parse_pages, args.html_cache)
+        rates = bench_parse(pages, args.parse_processes)
+        results['parse'] = {f"{name}_pages_per_sec": round(rate, 1) for name, rate in rates.items()}
+        print(f"parsování HTML ({len(pages)} stránek, {os.cpu_count()} CPU): "
+              + ", ".join(f"{name} {rate:,.0f} stránek/s" for name, rate in rates.items()))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"Výsledky uloženy do {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare_results(json.load(f), results)
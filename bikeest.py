@@ -0,0 +1,93 @@
+"""bikeest: jeden vstupní bod pro hledání URL, scrapování, trénink a predikci.
+
+    python bikeest.py discover --source search
+    python bikeest.py scrape --mode http --input ebike_urls.csv --output scraped.csv
+    python bikeest.py train --data spoj_updated.csv --dedup
+    python bikeest.py predict --input nove.jsonl
+    python bikeest.py startup
+
+Selenium, requests, pandas ani sklearn se při startu neimportují;
+každý podpříkaz si své moduly (COMMAND_MODULES) načte až při spuštění.
+"""
+import argparse
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Podpříkaz -> (skript, jeho run_* funkce, nápověda). Volby definuje build_parser
+# skriptu, takže bikeest a samotné skripty nemůžou mít různé argumenty.
+COMMANDS = {
+    'discover': ('url_crawler', 'run_discover', "Najde URL kol na mtbdatabase.com (url_crawler.py)"),
+    'scrape': ('craw2', 'run_scrape', "Stáhne specifikace kol z URL (craw2.py)"),
+    'train': ('train', 'run_training', "Natrénuje model ceny nad inzeráty (train.py)"),
+    'predict': ('predict', 'run_predict', "Skóruje inzeráty modelem (predict.py)"),
+}
+# Moduly, které podpříkaz potřebuje; načítají se až v něm a měří se v `startup`
+COMMAND_MODULES = {command: (module,) for command, (module, _, _) in COMMANDS.items()}
+
+
+def load_modules(command):
+    return [importlib.import_module(name) for name in COMMAND_MODULES[command]]
+
+
+def run_command(args):
+    """Předá zbylé argumenty build_parser skriptu podpříkazu a zavolá jeho run_* funkci."""
+    _, function, _ = COMMANDS[args.command]
+    module, = load_modules(args.command)
+    getattr(module, function)(module.build_parser(prog=f"bikeest {args.command}").parse_args(args.command_args))
+
+
+def measure_startup(commands=tuple(COMMAND_MODULES), repeats=5):
+    """Medián doby startu podpříkazu v ms: nový interpret, import bikeest a modulů podpříkazu.
+
+    Pod klíčem "cli" je samotné `import bikeest` (např. pro --help).
+    """
+    results = {}
+    for command in ("cli",) + tuple(commands):
+        code = "import bikeest" if command == "cli" else f"import bikeest; bikeest.load_modules({command!r})"
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, check=True)
+            times.append(time.perf_counter() - start)
+        results[command] = round(sorted(times)[len(times) // 2] * 1000, 1)
+    return results
+
+
+def run_startup(args):
+    unknown = set(args.commands) - set(COMMAND_MODULES)
+    if unknown:
+        raise SystemExit(f"Neznámé podpříkazy: {', '.join(sorted(unknown))}")
+    for command, ms in measure_startup(args.commands or tuple(COMMAND_MODULES), args.repeats).items():
+        modules = ", ".join(COMMAND_MODULES.get(command, ())) or "-"
+        print(f"{command:<10}{ms:>10.1f} ms   ({modules})")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bikeest", description="Hledání, scrapování, trénink a predikce cen kol")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, (_, _, help_text) in COMMANDS.items():
+        # Volby (i --help) parsuje až build_parser skriptu v run_command
+        subparser = subparsers.add_parser(command, add_help=False, help=f"{help_text}, volby viz bikeest {command} --help")
+        subparser.set_defaults(func=run_command)
+
+    startup = subparsers.add_parser("startup", help="Změří dobu startu jednotlivých podpříkazů")
+    startup.add_argument("commands", nargs="*", help=f"Podpříkazy ({', '.join(COMMAND_MODULES)}), jinak všechny")
+    startup.add_argument("--repeats", type=int, default=5)
+    startup.set_defaults(func=run_startup)
+    return parser
+
+
+if __name__ == "__main__":
+    parser = build_parser()
+    args, extra = parser.parse_known_args()
+    if args.command in COMMANDS:
+        args.command_args = extra
+    elif extra:
+        parser.error(f"neznámé argumenty: {' '.join(extra)}")
+    args.func(args)
@@ -0,0 +1,214 @@
+import argparse
+import json
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.neighbors import KDTree
+from main import preprocess_frame, derive_features, preprocessor, numeric_features, categorical_features
+
+FEATURES = numeric_features + categorical_features
+
+
+class FastEncoder:
+    """Numpy náhrada transform() fitnutého preprocessoru z main.py pro jednotlivé dotazy.
+
+    ColumnTransformer stojí na jeden řádek jednotky milisekund; tady je
+    imputace, škálování a one-hot předpočítané do polí a slovníků.
+    """
+
+    def __init__(self, fitted):
+        num = fitted.named_transformers_['num']
+        cat = fitted.named_transformers_['cat']
+        self.medians = num.named_steps['imputer'].statistics_
+        self.mean = num.named_steps['scaler'].mean_
+        self.scale = num.named_steps['scaler'].scale_
+        self.fill_value = cat.named_steps['imputer'].fill_value
+        onehot = cat.named_steps['onehot']
+        self.n_numeric = len(self.mean)
+        probe = self._probe_frame(onehot)
+        active = np.asarray(fitted.transform(probe))
+        self.n_outputs = active.shape[1]
+        self.columns = []
+        for i, (col, categories) in enumerate(zip(categorical_features, onehot.categories_)):
+            mapping = {}
+            for row, value in enumerate(probe[col].iloc[:len(categories)]):
+                # i-tý nenulový one-hot sloupec řádku patří i-tému kategoriálnímu sloupci
+                mapping[value] = self.n_numeric + np.flatnonzero(active[row, self.n_numeric:])[i]
+            self.columns.append(mapping)
+
+    @staticmethod
+    def _probe_frame(onehot):
+        """Rámec, kde každý kategoriální sloupec projde všemi svými kategoriemi."""
+        size = max(len(categories) for categories in onehot.categories_)
+        probe = {col: np.zeros(size) for col in numeric_features}
+        for col, categories in zip(categorical_features, onehot.categories_):
+            probe[col] = [categories[i % len(categories)] for i in range(size)]
+        return pd.DataFrame(probe)[FEATURES]
+
+    def encode(self, features):
+        """Jeden řádek (dict s FEATURES) -> vektor stejný jako preprocessor.transform."""
+        out = np.zeros(self.n_outputs)
+        numbers = np.array([features.get(col, np.nan) for col in numeric_features], dtype=float)
+        numbers = np.where(np.isnan(numbers), self.medians, numbers)
+        out[:self.n_numeric] = (numbers - self.mean) / self.scale
+        for col, mapping in zip(categorical_features, self.columns):
+            value = features.get(col)
+            column = mapping.get(self.fill_value if value is None else str(value))
+            if column is not None:
+                out[column] = 1.0
+        return out
+
+
+class ComparablesIndex:
+    """KD-strom nad škálovaným prostorem featur z main.py s cenami historických inzerátů.
+
+    Nové řádky se přidávají do malého bufferu prohledávaného hrubou silou;
+    jakmile přesáhne rebuild_fraction velikosti stromu, strom se přestaví
+    nad všemi řádky. Preprocessor zůstává z prvního fitu, takže se prostor
+    featur mezi přestavbami nemění.
+    """
+
+    def __init__(self, leaf_size=40, rebuild_fraction=0.1):
+        self.leaf_size = leaf_size
+        self.rebuild_fraction = rebuild_fraction
+        self.preprocessor = None
+        self.encoder = None
+        self.wheel_size_median = None
+        self.tree = None
+        self.tree_size = 0
+        self.X = np.empty((0, 0))
+        self.info = pd.DataFrame(columns=['title', 'url', 'price'])
+        self._urls = set()
+
+    def _prepare(self, raw):
+        """Surové inzeráty -> (featury po preprocess_frame, metadata) bez už známých URL."""
+        if 'url' in raw.columns:
+            raw = raw[~raw['url'].isin(self._urls)].drop_duplicates('url')
+        features = preprocess_frame(raw, self.wheel_size_median)
+        info = raw.loc[features.index].reindex(columns=['title', 'url', 'price'])
+        return features, info.reset_index(drop=True)
+
+    def fit(self, raw):
+        """Postaví index nad inzeráty ve formátu spoj_updated.csv."""
+        prices = raw[(raw['price'] > 100) & (raw['price'] < 5000)]
+        self.wheel_size_median = float(pd.to_numeric(
+            prices['wheel_size'].astype(str).str.extract(r'(\d+\.?\d*)', expand=False), errors='coerce'
+        ).median())
+        self._urls = set()
+        features, info = self._prepare(raw)
+        self.preprocessor = clone(preprocessor).set_params(sparse_threshold=0).fit(features[FEATURES])
+        self.encoder = FastEncoder(self.preprocessor)
+        self.X = np.asarray(self.preprocessor.transform(features[FEATURES]), dtype=float)
+        self.info = info
+        self._urls = set(info['url'].dropna())
+        self._sync_info()
+        self._rebuild()
+        return self
+
+    def _rebuild(self):
+        self.tree = KDTree(self.X, leaf_size=self.leaf_size)
+        self.tree_size = len(self.X)
+
+    def _sync_info(self):
+        self._titles = self.info['title'].to_numpy()
+        self._urls_array = self.info['url'].to_numpy()
+        self._prices = self.info['price'].to_numpy(dtype=float)
+
+    def add(self, raw):
+        """Přidá nové inzeráty; strom se přestaví jen když buffer naroste. Vrací počet přidaných."""
+        features, info = self._prepare(raw)
+        if features.empty:
+            return 0
+        self.X = np.vstack([self.X, self.preprocessor.transform(features[FEATURES])])
+        self.info = pd.concat([self.info, info], ignore_index=True)
+        self._urls.update(info['url'].dropna())
+        self._sync_info()
+        if len(self.X) - self.tree_size > self.rebuild_fraction * self.tree_size:
+            self._rebuild()
+        return len(features)
+
+    def _nearest(self, Z, k):
+        """k nejbližších řádků pro každý řádek Z: strom + hrubá síla nad bufferem."""
+        k_tree = min(k, self.tree_size)
+        distances, indices = self.tree.query(Z, k=k_tree)
+        if len(self.X) > self.tree_size:
+            buffer = self.X[self.tree_size:]
+            buffer_distances = np.sqrt(((Z[:, None, :] - buffer[None, :, :]) ** 2).sum(axis=2))
+            distances = np.hstack([distances, buffer_distances])
+            indices = np.hstack([indices, np.broadcast_to(np.arange(self.tree_size, len(self.X)), buffer_distances.shape)])
+            order = np.argsort(distances, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, order, axis=1)
+            indices = np.take_along_axis(indices, order, axis=1)
+        return distances, indices
+
+    def _neighbours(self, distances, indices):
+        """Seznam dictů title/url/price/distance; přes numpy pole, iloc by byl pomalejší než samotný dotaz."""
+        return [
+            {'title': self._titles[i], 'url': self._urls_array[i], 'price': float(self._prices[i]), 'distance': float(d)}
+            for d, i in zip(distances, indices)
+        ]
+
+    def query(self, listing, k=5):
+        """k nejpodobnějších inzerátů pro jeden inzerát (dict), seřazené podle vzdálenosti.
+
+        Dict s hotovými featurami (FEATURES) jde rychlou cestou přes
+        FastEncoder, surový inzerát se nejdřív projde derive_features.
+        """
+        if not all(col in listing for col in FEATURES):
+            listing = derive_features(pd.DataFrame([listing]), self.wheel_size_median).iloc[0].to_dict()
+        distances, indices = self._nearest(self.encoder.encode(listing)[None, :], k)
+        return self._neighbours(distances[0], indices[0])
+
+    def query_batch(self, listings, k=5):
+        """Sousedé pro DataFrame surových inzerátů, jeden seznam na řádek."""
+        features = derive_features(listings, self.wheel_size_median)
+        distances, indices = self._nearest(np.asarray(self.preprocessor.transform(features[FEATURES]), dtype=float), k)
+        return [self._neighbours(d, i) for d, i in zip(distances, indices)]
+
+    def save(self, path):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index srovnatelných inzerátů (k nejbližších sousedů)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Postaví index z CSV nebo listing_store")
+    build_parser.add_argument("--data", default="spoj_updated.csv")
+    build_parser.add_argument("--index", default="comparables.joblib")
+
+    add_parser = subparsers.add_parser("add", help="Přidá nové inzeráty do existujícího indexu")
+    add_parser.add_argument("--data", required=True)
+    add_parser.add_argument("--index", default="comparables.joblib")
+
+    query_parser = subparsers.add_parser("query", help="Sousedé pro inzerát zadaný jako JSON")
+    query_parser.add_argument("listing", help='JSON ve formátu spoj_updated.csv, např. {"title": "2021 Trek Fuel EX", "type": "trail", "frame_size": 3, ...}')
+    query_parser.add_argument("--index", default="comparables.joblib")
+    query_parser.add_argument("-k", type=int, default=5)
+
+    args = parser.parse_args()
+
+    from train import read_listings
+    # Pickle indexu musí odkazovat na modul comparables, ne na __main__
+    from comparables import ComparablesIndex
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = ComparablesIndex().fit(read_listings(args.data))
+        index.save(args.index)
+        print(f"Index z {len(index.X)} inzerátů uložen do {args.index} ({time.perf_counter() - start:.2f} s)")
+    elif args.command == "add":
+        index = ComparablesIndex.load(args.index)
+        added = index.add(read_listings(args.data))
+        index.save(args.index)
+        print(f"Přidáno {added} inzerátů, index má {len(index.X)} řádků (strom {index.tree_size})")
+    else:
+        index = ComparablesIndex.load(args.index)
+        for neighbour in index.query(json.loads(args.listing), k=args.k):
+            print(f"{neighbour['distance']:8.3f}  {neighbour['price']:8.0f}  {neighbour['title']}  {neighbour['url']}")
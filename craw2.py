@@ -1,5 +1,14 @@
+import argparse
+import contextlib
 import csv
-from concurrent.futures import ThreadPoolExecutor
+import itertools
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -8,29 +17,25 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
 import re
+from html_scraper import USER_AGENT, create_session, fetch_html, parse_product_html
+from driver_pool import DriverPool, CONSENT_PROFILE
+from async_fetch import run_crawl
+from frontier import Frontier
+from html_cache import HtmlCache
+from spec_extract import extract_specs
+from crawl_metrics import CrawlMetrics, timed
+from listing_store import ListingStore
+from rate_control import RateController, AdaptiveConcurrency, HostRateLimiter
 
-def parse_suspension(label, value):
-    """Zpracování specifikací vidlice a tlumiče."""
-    result = {}
-    if 'Fork' in label:
-        result['fork_brand'] = value.split()[0] if value else None
-        result['fork_model'] = re.sub(r'^\S+\s*', '', value.split(',')[0]).strip() if ',' in value else None
-        travel_match = re.search(r'(\d+mm)\s+travel', value)
-        result['fork_travel'] = travel_match.group(1) if travel_match else None
-        damper_match = re.search(r'(GRIP\d?|Fit\d+|Charger\d+)', value)
-        result['fork_damper'] = damper_match.group(1) if damper_match else None
-        offset_match = re.search(r'(\d+mm)\s+offset', value)
-        result['fork_offset'] = offset_match.group(1) if offset_match else None
-    elif 'Shock' in label:
-        result['shock_brand'] = value.split()[0] if value else None
-        result['shock_model'] = re.sub(r'^\S+\s*', '', value.split(',')[0]).strip() if ',' in value else None
-        dimensions = value.split('x') if 'x' in value else []
-        if len(dimensions) == 2:
-            length_match = re.search(r'(\d+mm)', dimensions[0])
-            stroke_match = re.search(r'(\d+mm)', dimensions[1])
-            result['shock_length'] = length_match.group(1) if length_match else None
-            result['shock_stroke'] = stroke_match.group(1) if stroke_match else None
-    return result
+FIELDNAMES = [
+    'url', 'title', 'price', 'year', 'brand', 
+    'frame_material', 'wheel_size', 'drivetrain_brand',
+    'fork_brand', 'fork_model', 'fork_travel', 
+    'fork_damper', 'fork_offset', 
+    'shock_brand', 'shock_model',
+    'shock_length', 'shock_stroke'
+]
+ERROR_FIELDNAMES = ['url', 'stage', 'error']
 
 def accept_consent(driver):
     """Přijme consent modal, pokud existuje."""
@@ -40,116 +45,606 @@ def accept_consent(driver):
         )
         accept_button.click()
         print("Consent úspěšně přijat.")
+        return True
     except Exception as e:
         print(f"Consent modal nebyl nalezen nebo došlo k chybě: {str(e)}")
+        return False
+
+def new_result(url):
+    """Prázdný výsledek pro URL se značkou vytaženou z URL."""
+    result = {
+        'url': url,
+        'title': None,
+        'price': None,
+        'year': None,
+        'brand': None,
+        'frame_material': None,
+        'wheel_size': None,
+        'drivetrain_brand': None,
+        'fork_brand': None,
+        'fork_model': None,
+        'fork_travel': None,
+        'fork_damper': None,
+        'fork_offset': None,
+        'shock_brand': None,
+        'shock_model': None,
+        'shock_length': None,
+        'shock_stroke': None
+    }
+
+    # Značka z URL
+    match = re.search(r'/bikes/\d{4}/([^/]+)/', url)
+    if match:
+        result['brand'] = match.group(1).capitalize()
+
+    return result
+
+def extract_page(driver, url, pooled=None, metrics=None):
+    """Načte URL v otevřeném driveru a vytáhne z ní data.
+
+    U driveru z poolu se consent řeší jen jednou za session.
+    """
+    with timed(metrics, "get"):
+        driver.get(url)
+    result = new_result(url)
+
+    if pooled is None or not pooled.consent_accepted:
+        with timed(metrics, "consent"):
+            consent = accept_consent(driver)
+        if pooled is not None:
+            pooled.consent_accepted = consent
+
+    with timed(metrics, "spec_wait"):
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "section.specifications"))
+        )
+
+    with timed(metrics, "extract"):
+        return _extract_fields(driver, result)
+
+def _extract_fields(driver, result):
+    """Vytáhne pole z načtené stránky do result."""
+    # Základní informace
+    result['title'] = driver.find_element(By.TAG_NAME, 'h1').text
+    result['price'] = driver.find_element(By.CSS_SELECTOR, '#final_price').text
+    result['year'] = driver.find_element(By.CSS_SELECTOR, 'div.col-md-5.col-12 > b').text
+
+    # Specifikace
+    specs_section = driver.find_element(By.CSS_SELECTOR, 'section.specifications')
+    
+    rows = []
+    for item in specs_section.find_elements(By.CLASS_NAME, 'list-group-item'):
+        try:
+            label = item.find_element(By.CLASS_NAME, 'font-weight-bold').text.strip().lower()
+            value = item.find_element(By.CLASS_NAME, 'text-muted').text.strip().lower()
+            rows.append((label, value))
+        except Exception as e:
+            print(f"Chyba při zpracování položky: {str(e)}")
+
+    result.update(extract_specs(rows))
+    return result
+
+def scrape_page(url, pool=None, metrics=None):
+    """Scrapuje data z jedné URL.
+
+    S poolem si vypůjčí běžící driver, jinak spustí a zavře vlastní Chrome.
+    """
+    if pool is not None:
+        with pool.driver() as pooled:
+            return extract_page(pooled.driver, url, pooled, metrics)
 
-def scrape_page(url):
-    """Scrapuje data z jedné URL."""
     chrome_options = Options()
     # chrome_options.add_argument("--headless")
     chrome_options.add_argument("--window-size=1920,1080")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_options
-    )
+    with timed(metrics, "driver_startup"):
+        driver = webdriver.Chrome(
+            service=Service(ChromeDriverManager().install()),
+            options=chrome_options
+        )
 
     try:
-        driver.get(url)
-        result = {
-            'url': url,
-            'title': None,
-            'price': None,
-            'year': None,
-            'brand': None,
-            'frame_material': None,
-            'wheel_size': None,
-            'drivetrain_brand': None,
-            'fork_brand': None,
-            'fork_model': None,
-            'fork_travel': None,
-            'fork_damper': None,
-            'fork_offset': None,
-            'shock_brand': None,
-            'shock_model': None,
-            'shock_length': None,
-            'shock_stroke': None
-        }
-
-        # Značka z URL
-        match = re.search(r'/bikes/\d{4}/([^/]+)/', url)
-        if match:
-            result['brand'] = match.group(1).capitalize()
-
-        accept_consent(driver)
+        return extract_page(driver, url, metrics=metrics)
+    finally:
+        driver.quit()
 
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "section.specifications"))
-        )
+def result_from_html(url, html):
+    """Sestaví výsledek ze statického HTML (str nebo bytes), None pokud chybí specifikace."""
+    page = parse_product_html(html)
+    if page is None:
+        return None
 
-        # Základní informace
-        result['title'] = driver.find_element(By.TAG_NAME, 'h1').text
-        result['price'] = driver.find_element(By.CSS_SELECTOR, '#final_price').text
-        result['year'] = driver.find_element(By.CSS_SELECTOR, 'div.col-md-5.col-12 > b').text
+    result = new_result(url)
+    result['title'] = page['title']
+    result['price'] = page['price']
+    result['year'] = page['year']
+    result.update(extract_specs(page['specs']))
 
-        # Specifikace
-        specs_section = driver.find_element(By.CSS_SELECTOR, 'section.specifications')
-        
-        for item in specs_section.find_elements(By.CLASS_NAME, 'list-group-item'):
-            try:
-                label = item.find_element(By.CLASS_NAME, 'font-weight-bold').text.strip().lower()
-                value = item.find_element(By.CLASS_NAME, 'text-muted').text.strip().lower()
-                if "frame" in label:
-                    result['frame_material'] = 'carbon' if 'carbon' in value else 'aluminium'
-                elif "wheel size" in label:
-                    result['wheel_size'] = value
-                elif "drivetrain" in label:
-                    result['drivetrain_brand'] = value.split()[0]
-                elif "fork" in label or "shock" in label:
-                    suspension_data = parse_suspension(label, value)
-                    result.update(suspension_data)
-            except Exception as e:
-                print(f"Chyba při zpracování položky: {str(e)}")
+    return result
+
+def scrape_page_http(url, session, pool=None, cache=None, metrics=None):
+    """Scrapuje URL bez prohlížeče, Selenium použije jen když HTML nemá specifikace."""
+    with timed(metrics, "fetch"):
+        html = fetch_html(url, session, cache=cache)
+    with timed(metrics, "parse"):
+        result = result_from_html(url, html)
+    if result is None:
+        print(f"Statické HTML neobsahuje specifikace, přepínám na Selenium: {url}")
+        return scrape_page(url, pool, metrics)
+    return result
 
+def scrape_async(urls, writer, concurrency=200, metrics=None, error_writer=None, stats=None):
+    """Stáhne URL asynchronně (trio + h11) a zapíše výsledky.
+
+    Vrací URL, jejichž statické HTML nemá specifikace a musí se
+    dotáhnout přes Selenium. S error_writer se chybové odpovědi
+    a výjimky zapisují jako chybové záznamy. Do stats (dict) se
+    zapíše počet uložených kol ('rows') a chyb ('errors').
+    """
+    fallback_urls = []
+    counts = {'rows': 0, 'errors': 0}
+
+    def record_error(url, message):
+        print(f"Chyba při stahování {url}: {message}")
+        counts['errors'] += 1
+        if error_writer is not None:
+            error_writer.writerow({'url': url, 'stage': 'fetch', 'error': message})
+
+    def handle_page(url, status, html):
+        if status != 200:
+            record_error(url, f"HTTP {status}")
+            return
+        with timed(metrics, "parse"):
+            result = result_from_html(url, html)
+        if result is None:
+            fallback_urls.append(url)
+        else:
+            with timed(metrics, "csv_write"):
+                writer.writerow(result)
+            counts['rows'] += 1
         return result
 
-    finally:
-        driver.quit()
+    def handle_error(url, exc):
+        record_error(url, f"{type(exc).__name__}: {exc}")
+
+    if metrics is not None:
+        handle_page = _traced_handler(handle_page, metrics)
+
+    run_crawl(urls, handle_page, handle_error, concurrency=concurrency)
+    print(f"Async: uloženo {counts['rows']} kol, {counts['errors']} chyb, {len(fallback_urls)} stránek pro Selenium")
+    if stats is not None:
+        stats.update(counts)
+    return fallback_urls
+
+def _traced_handler(handle_page, metrics):
+    """Obalí handler async crawlu měřením po URL (stažení samotné se neměří).
+
+    Stránka předaná Selenium fallbacku se tu neuzavírá, trace jí založí
+    až pipeline, jinak by se taková URL počítala dvakrát.
+    """
+    def traced(url, status, html):
+        trace = metrics.begin(url)
+        try:
+            with metrics.resume(trace):
+                if handle_page(url, status, html):
+                    trace.outcome = 'success'
+                elif status != 200:
+                    trace.outcome = 'error'
+        finally:
+            # Bez outcome (a bez výjimky) stránka pokračuje do Selenium cesty
+            if trace.outcome is not None:
+                metrics.finish(trace)
+    return traced
+
+def start_parse_executor(processes):
+    """ProcessPoolExecutor pro result_from_html, spuštěný hned při vytvoření.
+
+    Procesy startují přes forkserver (kde není, spawn), ne forkem
+    procesu, ve kterém už běží vlákna pipeline; první úloha spustí
+    forkserver ještě před nimi.
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context(method))
+    executor.submit(int).result()
+    return executor
 
-def process_urls(input_file, output_file):
-    """Zpracuje URL ze souboru CSV a uloží výsledky do jiného CSV."""
-    fieldnames = [
-        'url', 'title', 'price', 'year', 'brand', 
-        'frame_material', 'wheel_size', 'drivetrain_brand',
-        'fork_brand', 'fork_model', 'fork_travel', 
-        'fork_damper', 'fork_offset', 
-        'shock_brand', 'shock_model',
-        'shock_length', 'shock_stroke'
-    ]
+def parse_pages(pages, executor=None, batch_size=256, chunksize=16):
+    """Výsledky result_from_html pro dvojice (url, html) ve stejném pořadí.
 
+    S executorem (ProcessPoolExecutor) se stránky parsují v procesech
+    po dávkách batch_size, takže se vstup nenačte do paměti celý;
+    chunksize stránek se posílá procesu najednou.
+    """
+    if executor is None:
+        for url, html in pages:
+            yield result_from_html(url, html)
+        return
+    pages = iter(pages)
+    while True:
+        batch = list(itertools.islice(pages, batch_size))
+        if not batch:
+            break
+        urls, htmls = zip(*batch)
+        yield from executor.map(result_from_html, urls, htmls, chunksize=chunksize)
+
+def reparse_cache(cache_dir, output_file, parse_processes=None):
+    """Offline režim: znovu vytěží data ze všech stránek v HTML cache bez přístupu k síti.
+
+    S parse_processes se HTML parsuje v tolika procesech a z cache
+    se čte jako bytes, dekóduje ho až parser.
+    """
+    executor = start_parse_executor(parse_processes) if parse_processes else None
+    cache = HtmlCache(cache_dir)
+    parsed = missing = 0
+    try:
+        with open(output_file, mode='w', newline='', encoding='utf-8') as output_csv:
+            writer = csv.DictWriter(output_csv, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            for result in parse_pages(cache.iter_pages(raw=executor is not None), executor):
+                if result is None:
+                    missing += 1
+                    continue
+                writer.writerow(result)
+                parsed += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        cache.close()
+    print(f"Z cache zpracováno {parsed} stránek, {missing} bez specifikací, uloženo do {output_file}")
+
+def iter_urls(input_file):
+    """Streamuje URL z prvního sloupce CSV (s hlavičkou), soubor se nenačítá celý."""
     with open(input_file, mode='r') as file:
         csv_reader = csv.reader(file)
-        next(csv_reader)  # Přeskočí hlavičku
+        next(csv_reader, None)  # Přeskočí hlavičku
+        for row in csv_reader:
+            if row:
+                yield row[0]
+
+_DONE = object()
+
+class CrawlPipeline:
+    """Streamovaná pipeline: čtení URL -> stahování -> parsování -> jeden zapisovač.
+
+    Mezi fázemi jsou omezené fronty, takže pomalejší fáze přibrzdí
+    předchozí (backpressure) a paměť nezávisí na počtu URL. CSV zapisuje
+    jen vlákno zapisovače, po dávkách flush_every řádků. Každé selhání
+    (výjimka při stahování či parsování, stránka bez specifikací) se
+    zapíše jako chybový záznam.
+
+    fetch(url) vrací (druh, data), parse(url, druh, data) vrací výsledek nebo None.
+    """
+
+    def __init__(self, fetch, parse, writer, error_writer, flush=None, fetch_workers=5, parse_workers=2,
+                 queue_size=None, flush_every=100, flush_interval=1.0, metrics=None):
+        self.fetch = fetch
+        self.parse = parse
+        self.writer = writer
+        self.error_writer = error_writer
+        self.flush = flush or (lambda: None)
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        queue_size = queue_size or 4 * fetch_workers
+        self.url_queue = queue.Queue(maxsize=queue_size)
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.rows = 0
+        self.errors = 0
+        self._writer_error = None
+
+    def _resume(self, trace):
+        return self.metrics.resume(trace) if trace is not None else contextlib.nullcontext()
+
+    def _fetch_worker(self):
+        while True:
+            url = self.url_queue.get()
+            if url is _DONE:
+                break
+            trace = self.metrics.begin(url) if self.metrics is not None else None
+            try:
+                with self._resume(trace):
+                    kind, data = self.fetch(url)
+            except Exception as e:
+                self.write_queue.put(('error', url, ('fetch', e), trace))
+                continue
+            self.parse_queue.put((url, kind, data, trace))
+
+    def _parse_worker(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is _DONE:
+                break
+            url, kind, data, trace = item
+            try:
+                with self._resume(trace):
+                    result = self.parse(url, kind, data)
+            except Exception as e:
+                self.write_queue.put(('error', url, ('parse', e), trace))
+                continue
+            if result:
+                self.write_queue.put(('row', url, result, trace))
+            else:
+                self.write_queue.put(('error', url, ('parse', "Stránka neobsahuje specifikace"), trace))
+
+    def _write(self, kind, url, data, trace):
+        with self._resume(trace), timed(self.metrics, "csv_write"):
+            if kind == 'row':
+                self.writer.writerow(data)
+                self.rows += 1
+                if trace is not None:
+                    trace.outcome = 'success'
+            else:
+                stage, error = data
+                message = f"{type(error).__name__}: {error}" if isinstance(error, Exception) else str(error)
+                print(f"Chyba ({stage}) u {url}: {message}")
+                self.error_writer.writerow({'url': url, 'stage': stage, 'error': message})
+                self.errors += 1
+
+    def _writer(self):
+        pending = 0
+        while True:
+            try:
+                item = self.write_queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                if pending and self._writer_error is None:
+                    self.flush()
+                    pending = 0
+                continue
+            if item is _DONE:
+                break
+            trace = item[3]
+            if self._writer_error is None:
+                # Po chybě zápisu se fronta dál vyprazdňuje, aby se předchozí fáze nezablokovaly
+                try:
+                    self._write(*item)
+                    pending += 1
+                    if pending >= self.flush_every:
+                        self.flush()
+                        pending = 0
+                except Exception as e:
+                    self._writer_error = e
+            if trace is not None:
+                self.metrics.finish(trace)
+        if pending and self._writer_error is None:
+            self.flush()
+
+    def run(self, urls):
+        """Projde všechny URL, vrací (zapsané řádky, chybové záznamy)."""
+        fetchers = [threading.Thread(target=self._fetch_worker, daemon=True) for _ in range(self.fetch_workers)]
+        parsers = [threading.Thread(target=self._parse_worker, daemon=True) for _ in range(self.parse_workers)]
+        writer = threading.Thread(target=self._writer, daemon=True)
+        for thread in fetchers + parsers + [writer]:
+            thread.start()
+
+        try:
+            # Čtení URL běží v hlavním vlákně, při plné frontě čeká
+            for url in urls:
+                self.url_queue.put(url)
+        finally:
+            for _ in fetchers:
+                self.url_queue.put(_DONE)
+            for thread in fetchers:
+                thread.join()
+            for _ in parsers:
+                self.parse_queue.put(_DONE)
+            for thread in parsers:
+                thread.join()
+            self.write_queue.put(_DONE)
+            writer.join()
 
-        urls = [row[0] for row in csv_reader]
+        if self._writer_error is not None:
+            raise self._writer_error
+        return self.rows, self.errors
 
-    with open(output_file, mode='w', newline='', encoding='utf-8') as output_csv:
-        writer = csv.DictWriter(output_csv, fieldnames=fieldnames)
+def process_urls(input_file, output_file, mode='selenium', max_workers=5, recycle_after=200, concurrency=200, cache_dir=None, metrics=None, lightweight=False, consent_profile=CONSENT_PROFILE, rate_control=None, parse_workers=2, errors_file=None, parse_processes=None):
+    """Zpracuje URL ze souboru CSV a uloží výsledky do jiného CSV.
+
+    mode='selenium' otevírá každou stránku v Chrome, mode='http' stahuje
+    HTML přes sdílenou requests.Session a Chrome spouští jen jako fallback,
+    mode='async' stahuje až `concurrency` stránek najednou v jednom vlákně.
+    S cache_dir se v režimu http surové HTML ukládá do HtmlCache
+    a při dalším běhu se stránky jen revalidují.
+    Vlákna si půjčují drivery z poolu max_workers prohlížečů, každý driver
+    se recykluje po recycle_after stránkách nebo po pádu.
+    S metrics (CrawlMetrics) se měří čas každé fáze pro každou URL.
+    S lightweight prohlížeč nestahuje obrázky, média a třetí strany
+    a consent cookies bere z consent_profile.
+    S rate_control (RateController) se počet souběžných požadavků řídí
+    adaptivně až do jeho maxima, každý host má token bucket a přetížení
+    se opakuje s backoffem; max_workers pak určuje jen velikost poolu prohlížečů.
+    URL procházejí přes CrawlPipeline, selhání se zapisují do errors_file
+    (výchozí <output>_errors.csv).
+    S parse_processes se HTML v režimu http stahuje jako bytes a parsuje
+    v ProcessPoolExecutor s tolika procesy, vlákna parsování na něj jen čekají.
+    """
+    errors_file = errors_file or f"{os.path.splitext(output_file)[0]}_errors.csv"
+
+    with open(output_file, mode='w', newline='', encoding='utf-8') as output_csv, \
+            open(errors_file, mode='w', newline='', encoding='utf-8') as errors_csv:
+        writer = csv.DictWriter(output_csv, fieldnames=FIELDNAMES)
         writer.writeheader()
+        error_writer = csv.DictWriter(errors_csv, fieldnames=ERROR_FIELDNAMES)
+        error_writer.writeheader()
+
+        def flush():
+            output_csv.flush()
+            errors_csv.flush()
+
+        executor = start_parse_executor(parse_processes) if (parse_processes and mode == 'http') else None
+        threads = max(max_workers, rate_control.concurrency.maximum) if rate_control is not None else max_workers
+        pool = DriverPool(size=max_workers, max_pages=recycle_after, metrics=metrics, lightweight=lightweight, consent_profile=consent_profile)
+        session = create_session(pool_size=threads)
+        cache = HtmlCache(cache_dir) if (cache_dir and mode == 'http') else None
+
+        def fetch(url):
+            if mode == 'http':
+                with timed(metrics, "fetch"):
+                    return 'html', fetch_html(url, session, cache=cache, raw=executor is not None)
+            return 'result', scrape_page(url, pool, metrics)
+
+        def parse(url, kind, data):
+            if kind == 'result':
+                return data
+            with timed(metrics, "parse"):
+                if executor is not None:
+                    result = executor.submit(result_from_html, url, data).result()
+                else:
+                    result = result_from_html(url, data)
+            if result is None:
+                print(f"Statické HTML neobsahuje specifikace, přepínám na Selenium: {url}")
+                return scrape_page(url, pool, metrics)
+            return result
+
+        if rate_control is not None:
+            fetch = partial(rate_control.call, fetch)
+
+        urls = iter_urls(input_file)
+        # Kola a chyby z async fáze; celkový součet je až s fallback pipeline
+        async_stats = {'rows': 0, 'errors': 0}
+        try:
+            if mode == 'async':
+                # Do Selenium cesty pokračují jen stránky bez specifikací ve statickém HTML
+                urls = scrape_async(urls, writer, concurrency=concurrency, metrics=metrics, error_writer=error_writer,
+                                    stats=async_stats)
+
+            if executor is not None:
+                # Každé vlákno čeká na jednu stránku, na plné vytížení procesů jich musí být aspoň tolik
+                parse_workers = max(parse_workers, parse_processes)
+            pipeline = CrawlPipeline(fetch, parse, writer, error_writer, flush=flush, fetch_workers=threads,
+                                     parse_workers=parse_workers, metrics=metrics)
+            rows, errors = pipeline.run(urls)
+            rows += async_stats['rows']
+            errors += async_stats['errors']
+            print(f"Uloženo {rows} kol do {output_file}, {errors} chyb v {errors_file}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            pool.close()
+
+def frontier_worker(db_path, mode='http', batch_size=10, recycle_after=200, cache_dir=None, lightweight=False, consent_profile=CONSENT_PROFILE):
+    """Jeden worker proces: bere dávky URL z fronty, dokud nějaké zbývají."""
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    frontier = Frontier(db_path)
+    pool = DriverPool(size=1, max_pages=recycle_after, lightweight=lightweight, consent_profile=consent_profile)
+    if mode == 'http':
+        cache = HtmlCache(cache_dir) if cache_dir else None
+        scrape = partial(scrape_page_http, session=create_session(pool_size=1), pool=pool, cache=cache)
+    else:
+        scrape = partial(scrape_page, pool=pool)
+
+    try:
+        while True:
+            urls = frontier.claim(owner, batch_size)
+            if not urls:
+                break
+            for url in urls:
+                try:
+                    frontier.complete(url, owner, scrape(url))
+                except Exception as e:
+                    print(f"Chyba při scrapování {url}: {str(e)}")
+                    frontier.fail(url, owner, e)
+    finally:
+        pool.close()
+        frontier.close()
+
+def process_frontier(input_file, output_file, db_path, processes=4, mode='http', batch_size=10, recycle_after=200, cache_dir=None, lightweight=False, consent_profile=CONSENT_PROFILE):
+    """Scrapuje URL přes perzistentní frontu v SQLite v několika procesech.
 
-        def process_url(url):
-            scraped_data = scrape_page(url)
-            if scraped_data:
-                writer.writerow(scraped_data)  # Save each bike immediately
+    Po pádu nebo restartu pokračuje tam, kde skončil, hotové URL se
+    znovu nestahují a výstupní CSV se na konci vygeneruje z celé fronty.
+    """
+    frontier = Frontier(db_path)
+    try:
+        added = frontier.add_from_csv(input_file)
+        print(f"Do fronty přidáno {added} nových URL, stav: {frontier.stats()}")
+
+        workers = [
+            multiprocessing.Process(target=frontier_worker, args=(db_path, mode, batch_size, recycle_after, cache_dir, lightweight, consent_profile))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
 
-        with ThreadPoolExecutor(max_workers=5) as executor:  # Paralelizace s 5 vlákny
-            executor.map(process_url, urls)
+        frontier.export_csv(output_file, FIELDNAMES)
+        print(f"Výsledky uloženy do {output_file}, stav fronty: {frontier.stats()}")
+    finally:
+        frontier.close()
+
+def build_parser(prog=None):
+    """Argumenty scraperu; sdílí je craw2.py i bikeest scrape."""
+    parser = argparse.ArgumentParser(prog=prog, description="Scraper specifikací kol z mtbdatabase.com")
+    parser.add_argument("--input", default="ebike_urls.csv", help="CSV s URL (první sloupec, s hlavičkou)")
+    parser.add_argument("--output", default="scraped.csv")
+    parser.add_argument("--mode", choices=["selenium", "http", "async"], default="selenium")
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=200, help="Počet souběžných požadavků v režimu async")
+    parser.add_argument("--recycle-after", type=int, default=200, help="Počet stránek, po kterém se driver restartuje")
+    parser.add_argument("--frontier", help="SQLite fronta URL pro navazování a běh ve více procesech")
+    parser.add_argument("--parse-workers", type=int, default=2, help="Počet vláken parsování HTML")
+    parser.add_argument("--parse-processes", type=int, default=0, help="Počet procesů parsování HTML v režimu http a s --reparse-cache (0 = parsuje se ve vláknech)")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(), help="Počet worker procesů s --frontier")
+    parser.add_argument("--cache", help="Adresář HTML cache pro režim http")
+    parser.add_argument("--reparse-cache", action="store_true", help="Jen znovu zpracuje stránky z --cache, bez sítě")
+    parser.add_argument("--lightweight", action="store_true", help="Prohlížeč bez obrázků, médií a třetích stran, eager načítání")
+    parser.add_argument("--consent-profile", default=CONSENT_PROFILE, help="Soubor s uloženými consent cookies pro --lightweight")
+    parser.add_argument("--adaptive", action="store_true", help="Adaptivní souběžnost (AIMD), token bucket na host a opakování s backoffem")
+    parser.add_argument("--max-concurrency", type=int, default=64, help="Horní mez souběžnosti s --adaptive")
+    parser.add_argument("--host-rate", type=float, default=10.0, help="Požadavků za sekundu na jeden host s --adaptive")
+    parser.add_argument("--retries", type=int, default=3, help="Počet opakování po 429/5xx/timeoutu s --adaptive")
+    parser.add_argument("--store", help="SQLite listing_store, do kterého se výsledky běhu upsertují podle URL")
+    parser.add_argument("--trace", help="JSONL soubor s časy fází pro každou URL")
+    parser.add_argument("--metrics", help="Soubor se snapshotem čítačů ve formátu Prometheus")
+    return parser
+
+def run_scrape(args):
+    """Scrapování podle argumentů z build_parser: pipeline, fronta (--frontier) nebo jen reparse cache."""
+    input_file = args.input
+    output_file = args.output
+
+    if args.reparse_cache:
+        if not args.cache:
+            raise SystemExit("--reparse-cache vyžaduje --cache")
+        reparse_cache(args.cache, output_file, parse_processes=args.parse_processes)
+    elif args.frontier:
+        if args.mode == "async":
+            raise SystemExit("--frontier podporuje jen režimy selenium a http")
+        process_frontier(input_file, output_file, args.frontier, processes=args.processes, mode=args.mode, recycle_after=args.recycle_after, cache_dir=args.cache, lightweight=args.lightweight, consent_profile=args.consent_profile)
+    else:
+        metrics = CrawlMetrics(args.trace) if (args.trace or args.metrics) else None
+        rate_control = None
+        if args.adaptive:
+            rate_control = RateController(
+                AdaptiveConcurrency(initial=args.workers, maximum=args.max_concurrency),
+                HostRateLimiter(rate=args.host_rate),
+                retries=args.retries,
+                metrics=metrics,
+            )
+        try:
+            process_urls(input_file, output_file, mode=args.mode, max_workers=args.workers, recycle_after=args.recycle_after, concurrency=args.concurrency, cache_dir=args.cache, metrics=metrics, lightweight=args.lightweight, consent_profile=args.consent_profile, rate_control=rate_control, parse_workers=args.parse_workers, parse_processes=args.parse_processes)
+        finally:
+            if rate_control is not None:
+                print(f"Řízení rychlosti: {rate_control.summary()}")
+            if metrics is not None:
+                metrics.print_summary()
+                if args.metrics:
+                    metrics.write_prometheus(args.metrics)
+                metrics.close()
+
+    if args.store:
+        store = ListingStore(args.store)
+        try:
+            _, changed = store.import_csv(output_file, kind='specs')
+            print(f"Do {args.store} upsertováno {changed} změněných záznamů")
+        finally:
+            store.close()
 
 if __name__ == "__main__":
-    input_file = "ebike_urls.csv"
-    output_file = "scraped.csv"
-    
-    process_urls(input_file, output_file)
+    run_scrape(build_parser().parse_args())
@@ -0,0 +1,158 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+OUTCOMES = ('success', 'timeout', 'parse_failure', 'error')
+
+
+def _is_timeout(exc):
+    """Selenium TimeoutException, requests Timeout i socket.timeout."""
+    return isinstance(exc, TimeoutError) or 'Timeout' in type(exc).__name__
+
+
+def timed(metrics, name):
+    """metrics.stage(name), nebo nic, když se neměří."""
+    if metrics is None:
+        return contextlib.nullcontext()
+    return metrics.stage(name)
+
+
+class UrlTrace:
+    """Časy jednotlivých fází pro jednu URL."""
+
+    def __init__(self, url):
+        self.url = url
+        self.started = time.perf_counter()
+        self.stages = defaultdict(float)
+        self.outcome = None
+
+
+class CrawlMetrics:
+    """Měření fází crawlu po URL: JSONL trace a snapshot v textovém formátu Prometheus.
+
+    Aktuální URL se drží v thread-local, takže fáze měřené hluboko
+    ve volání (start driveru v poolu, čekání na specifikace) se
+    připíší ke správné URL i při běhu ve více vláknech.
+    """
+
+    def __init__(self, trace_path=None):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.outcomes = Counter()
+        self.stage_seconds = Counter()
+        self.stage_count = Counter()
+        self.started = time.perf_counter()
+        self._trace = open(trace_path, "a", encoding="utf-8") if trace_path else None
+
+    def close(self):
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+    @contextlib.contextmanager
+    def url(self, url):
+        """Měří jednu URL; výsledek nastaví volající přes trace.outcome.
+
+        Bez nastaveného outcome se URL počítá jako parse_failure, výjimka
+        jako timeout nebo error.
+        """
+        trace = self.begin(url)
+        try:
+            with self.resume(trace):
+                yield trace
+        finally:
+            self.finish(trace)
+
+    def begin(self, url):
+        """Založí trace pro URL, která projde několika vlákny (fázemi pipeline)."""
+        return UrlTrace(url)
+
+    @contextlib.contextmanager
+    def resume(self, trace):
+        """Fáze měřené v tomto bloku se připíší k trace, výjimka nastaví outcome."""
+        self._local.trace = trace
+        try:
+            yield trace
+        except Exception as e:
+            trace.outcome = 'timeout' if _is_timeout(e) else 'error'
+            trace.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._local.trace = None
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            trace = getattr(self._local, 'trace', None)
+            if trace is not None:
+                trace.stages[name] += elapsed
+            with self._lock:
+                self.stage_seconds[name] += elapsed
+                self.stage_count[name] += 1
+
+    def finish(self, trace):
+        """Uzavře trace a zapíše ho do JSONL."""
+        outcome = trace.outcome or 'parse_failure'
+        record = {
+            'url': trace.url,
+            'thread': threading.current_thread().name,
+            'outcome': outcome,
+            'total_s': round(time.perf_counter() - trace.started, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in trace.stages.items()},
+        }
+        if hasattr(trace, 'error'):
+            record['error'] = trace.error
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if self._trace is not None:
+                self._trace.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._trace.flush()
+
+    def prometheus_text(self):
+        """Snapshot čítačů v textovém formátu Prometheus."""
+        lines = [
+            "# HELP crawl_pages_total Zpracované URL podle výsledku.",
+            "# TYPE crawl_pages_total counter",
+        ]
+        with self._lock:
+            for outcome in OUTCOMES:
+                lines.append(f'crawl_pages_total{{outcome="{outcome}"}} {self.outcomes[outcome]}')
+            lines += [
+                "# HELP crawl_stage_seconds Čas strávený ve fázích crawlu.",
+                "# TYPE crawl_stage_seconds summary",
+            ]
+            for name in sorted(self.stage_seconds):
+                lines.append(f'crawl_stage_seconds_sum{{stage="{name}"}} {self.stage_seconds[name]:.6f}')
+                lines.append(f'crawl_stage_seconds_count{{stage="{name}"}} {self.stage_count[name]}')
+        lines += [
+            "# HELP crawl_elapsed_seconds Doba běhu crawlu.",
+            "# TYPE crawl_elapsed_seconds gauge",
+            f"crawl_elapsed_seconds {time.perf_counter() - self.started:.6f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def summary(self):
+        """Podíl jednotlivých fází na celkovém měřeném čase (sečteno přes vlákna)."""
+        with self._lock:
+            total = sum(self.stage_seconds.values()) or 1.0
+            stages = {name: (seconds, seconds / total) for name, seconds in self.stage_seconds.most_common()}
+            return dict(self.outcomes), stages
+
+    def print_summary(self):
+        outcomes, stages = self.summary()
+        print(f"Výsledky: {outcomes}")
+        for name, (seconds, share) in stages.items():
+            print(f"  {name:<16}{seconds:>10.2f} s{share * 100:>7.1f} %")
@@ -1,3 +1,4 @@
+import argparse
 import csv
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -5,45 +6,16 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.wait import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 import re
 import os 
-
-def parse_suspension(label, value):
-    result = {}
-    
-    if 'Fork' in label:
-        # Zpracování vidlice
-        result['fork_brand'] = value.split()[0] if value else None
-        result['fork_model'] = re.sub(r'^\S+\s*', '', value.split(',')[0]).strip() if ',' in value else None
-        
-        # Hledání parametrů pomocí regulárních výrazů
-        travel_match = re.search(r'(\d+mm)\s+travel', value)
-        result['fork_travel'] = travel_match.group(1) if travel_match else None
-        
-        damper_match = re.search(r'(GRIP\d?|Fit\d+|Charger\d+)', value)
-        result['fork_damper'] = damper_match.group(1) if damper_match else None
-        
-        offset_match = re.search(r'(\d+mm)\s+offset', value)
-        result['fork_offset'] = offset_match.group(1) if offset_match else None
-
-    elif 'Shock' in label:
-        # Zpracování tlumiče
-        result['shock_brand'] = value.split()[0] if value else None
-        result['shock_model'] = re.sub(r'^\S+\s*', '', value.split(',')[0]).strip() if ',' in value else None
-        
-        # Rozdělení rozměrů
-        if 'x' in value:
-            dimensions = value.split('x')
-            length_match = re.search(r'(\d+mm)', dimensions[0])
-            stroke_match = re.search(r'(\d+mm)', dimensions[1])
-            result['shock_length'] = length_match.group(1) if length_match else None
-            result['shock_stroke'] = stroke_match.group(1) if stroke_match else None
-        else:
-            result['shock_length'] = re.search(r'(\d+mm)\s+length', value).group(1) if re.search(r'(\d+mm)\s+length', value) else None
-            result['shock_stroke'] = re.search(r'(\d+mm)\s+stroke', value).group(1) if re.search(r'(\d+mm)\s+stroke', value) else None
-
-    return result
+from functools import partial
+from html_scraper import create_session, fetch_html, parse_product_html
+from async_fetch import run_crawl
+from frontier import Frontier
+from html_cache import HtmlCache
+from spec_extract import extract_specs, SUSPENSION_FIELDS
+from driver_pool import build_chrome_options, enable_lightweight, load_consent_cookies, save_consent_cookies, CONSENT_PROFILE
 
 def accept_consent(driver):
     try:
@@ -57,78 +29,150 @@ def accept_consent(driver):
         print(f"Chyba při klikání na consent tlačítko: {str(e)}")
         return False
 
-def scrape_page(url):
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36")
+def new_result(url):
+    result = {
+        'title': None,
+        'price': None,
+        'year': None,
+        'brand': None,
+        'frame_material': None,
+        'suspension': {},
+        'wheel_size': None,
+        'drivetrain_brand': None
+    }
+
+    # Extract brand from the URL
+    match = re.search(r'/bikes/\d{4}/([^/]+)/', url)
+    if match:
+        result['brand'] = match.group(1).capitalize()
+
+    return result
+
+def apply_specs(result, rows):
+    specs = extract_specs(rows)
+    for key in SUSPENSION_FIELDS:
+        if key in specs:
+            result['suspension'][key] = specs.pop(key)
+    result.update(specs)
 
+def scrape_page(url, lightweight=False, consent_profile=CONSENT_PROFILE):
+    # V odlehčeném režimu bez obrázků a třetích stran, consent cookies z uloženého profilu
     driver = webdriver.Chrome(
         service=Service(ChromeDriverManager().install()),
-        options=chrome_options
+        options=build_chrome_options(headless=True, lightweight=lightweight)
     )
 
     try:
+        consent_seeded = lightweight and enable_lightweight(driver, load_consent_cookies(consent_profile))
         driver.get(url)
-        result = {
-            'title': None,
-            'price': None,
-            'year': None,
-            'brand': None,
-            'frame_material': None,
-            'suspension': {},
-            'wheel_size': None,
-            'drivetrain_brand': None
-        }
-
-        # Extract brand from the URL
-        match = re.search(r'/bikes/\d{4}/([^/]+)/', url)
-        if match:
-            result['brand'] = match.group(1).capitalize()
-
-        if accept_consent(driver):
+        result = new_result(url)
+
+        # Nenalezený consent modal už neznamená ztrátu stránky, rozhoduje až čekání na specifikace
+        if not consent_seeded and accept_consent(driver) and lightweight:
+            save_consent_cookies(driver, consent_profile)
+
+        try:
             WebDriverWait(driver, 15).until(  # Reduce wait time from 30 to 15 seconds
                 EC.presence_of_element_located((By.CSS_SELECTOR, "section.specifications"))
             )
+        except TimeoutException:
+            print(f"Specifikace se nenačetly: {url}")
+            return None
 
-            # Základní informace
-            result['title'] = driver.find_element(By.TAG_NAME, 'h1').text
-            result['price'] = driver.find_element(By.CSS_SELECTOR, '#final_price').text
-            result['year'] = driver.find_element(By.CSS_SELECTOR, 'div.col-md-5.col-12 > b').text
-            
-            # Zpracování specifikací
-            specs_section = driver.find_element(By.CSS_SELECTOR, 'section.specifications')
-            
-            for item in specs_section.find_elements(By.CLASS_NAME, 'list-group-item'):
-                try:
-                    label = item.find_element(By.CLASS_NAME, 'font-weight-bold').text.strip().lower()
-                    value = item.find_element(By.CLASS_NAME, 'text-muted').text.strip().lower()
-
-
-                    
-                    if "Frame" in label:
-                        result['frame_material'] = 'carbon' if 'carbon' in value else 'aluminium'
-                    elif "wheel size" in label:
-                        result['wheel_size'] = value
-                    elif "drivetrain" in label:
-                        result['drivetrain_brand'] = value.split()[0]
-                    elif "fork" in label or "shock" in label:
-                        suspension_data = parse_suspension(label, value)
-                        result['suspension'].update(suspension_data)
-
-                except Exception as e:
-                    print(f"Chyba při zpracování položky: {str(e)}")
-
-            return result
+        # Základní informace
+        result['title'] = driver.find_element(By.TAG_NAME, 'h1').text
+        result['price'] = driver.find_element(By.CSS_SELECTOR, '#final_price').text
+        result['year'] = driver.find_element(By.CSS_SELECTOR, 'div.col-md-5.col-12 > b').text
 
-        return None
+        # Zpracování specifikací
+        specs_section = driver.find_element(By.CSS_SELECTOR, 'section.specifications')
+
+        rows = []
+        for item in specs_section.find_elements(By.CLASS_NAME, 'list-group-item'):
+            try:
+                label = item.find_element(By.CLASS_NAME, 'font-weight-bold').text.strip().lower()
+                value = item.find_element(By.CLASS_NAME, 'text-muted').text.strip().lower()
+                rows.append((label, value))
+
+            except Exception as e:
+                print(f"Chyba při zpracování položky: {str(e)}")
+
+        apply_specs(result, rows)
+
+        return result
 
     finally:
         driver.quit()
 
+def result_from_html(url, html):
+    # Výsledek ze statického HTML, None pokud stránka nemá specifikace
+    page = parse_product_html(html)
+    if page is None:
+        return None
+
+    result = new_result(url)
+    result['title'] = page['title']
+    result['price'] = page['price']
+    result['year'] = page['year']
+    apply_specs(result, page['specs'])
+
+    return result
+
+def scrape_page_http(url, session, cache=None, lightweight=False):
+    # Fast path bez prohlížeče, Selenium jen pokud HTML nemá specifikace
+    result = result_from_html(url, fetch_html(url, session, cache=cache))
+    if result is None:
+        print(f"Statické HTML neobsahuje specifikace, přepínám na Selenium: {url}")
+        return scrape_page(url, lightweight=lightweight)
+    return result
+
+def save_result(writer, url, result):
+    if result:
+        print("\nÚspěšně scrapováno:")
+        print(f"Název: {result['title']}")
+        print(f"Cena: {result['price']}")
+        print(f"Rok: {result['year']}")
+        print(f"Značka: {result['brand']}")
+        print(f"Materiál rámu: {result['frame_material']}")
+        print(f"Velikost kol: {result['wheel_size']}")
+        print(f"Značka pohonu: {result['drivetrain_brand']}")
+        
+        print("\nDetaily odpružení:")
+        for key, value in result['suspension'].items():
+            print(f"{key.replace('_', ' ').title()}: {value}")
+
+        # Flatten suspension data into the result dictionary
+        suspension_data = result.pop('suspension', {})
+        result.update(suspension_data)
+
+        # Add the URL to the result
+        result['url'] = url
+
+        # Replace None values with the string 'None'
+        result = {key: (value if value is not None else 'None') for key, value in result.items()}
+
+        # Write the result to the output CSV immediately
+        writer.writerow(result)
+        print("Výsledek uložen do CSV.")
+    else:
+        print("Scrapování selhalo")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["selenium", "http", "async"], default="selenium")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--frontier", help="SQLite fronta URL, po restartu pokračuje od nezpracovaných URL")
+    parser.add_argument("--cache", help="Adresář HTML cache pro režim http")
+    parser.add_argument("--lightweight", action="store_true", help="Prohlížeč bez obrázků, médií a třetích stran s uloženými consent cookies")
+    args = parser.parse_args()
+    if args.frontier and args.mode == "async":
+        parser.error("--frontier podporuje jen režimy selenium a http")
+
+    scrape_browser = partial(scrape_page, lightweight=args.lightweight)
+
+    session = create_session(pool_size=1) if args.mode == "http" else None
+    cache = HtmlCache(args.cache) if (args.cache and args.mode == "http") else None
+
     input_file = "ebike_urls.csv"
     output_file = "scraped_bike_data.csv"
 
@@ -150,40 +194,62 @@ if __name__ == "__main__":
                 csv_reader = csv.reader(file)
                 next(csv_reader)  # Skip the header row if present
 
-                for row in csv_reader:
-                    url = row[0]
-                    print(f"Scraping URL: {url}")
-                    result = scrape_page(url)
-
-                    if result:
-                        print("\nÚspěšně scrapováno:")
-                        print(f"Název: {result['title']}")
-                        print(f"Cena: {result['price']}")
-                        print(f"Rok: {result['year']}")
-                        print(f"Značka: {result['brand']}")
-                        print(f"Materiál rámu: {result['frame_material']}")
-                        print(f"Velikost kol: {result['wheel_size']}")
-                        print(f"Značka pohonu: {result['drivetrain_brand']}")
-                        
-                        print("\nDetaily odpružení:")
-                        for key, value in result['suspension'].items():
-                            print(f"{key.replace('_', ' ').title()}: {value}")
-
-                        # Flatten suspension data into the result dictionary
-                        suspension_data = result.pop('suspension', {})
-                        result.update(suspension_data)
-
-                        # Add the URL to the result
-                        result['url'] = url
-
-                        # Replace None values with the string 'None'
-                        result = {key: (value if value is not None else 'None') for key, value in result.items()}
-
-                        # Write the result to the output CSV immediately
-                        writer.writerow(result)
-                        print("Výsledek uložen do CSV.")
-                    else:
-                        print("Scrapování selhalo")
+                if args.mode == "async":
+                    fallback_urls = []
+
+                    def handle_page(url, status, html):
+                        result = result_from_html(url, html) if status == 200 else None
+                        if result is None and status == 200:
+                            fallback_urls.append(url)
+                        else:
+                            save_result(writer, url, result)
+
+                    run_crawl((row[0] for row in csv_reader), handle_page, concurrency=args.concurrency)
+
+                    # Stránky bez specifikací ve statickém HTML projdou přes Selenium
+                    for url in fallback_urls:
+                        print(f"Scraping URL: {url}")
+                        save_result(writer, url, scrape_browser(url))
+                elif args.frontier:
+                    frontier = Frontier(args.frontier)
+                    frontier.add_urls(row[0] for row in csv_reader)
+                    owner = f"crawler:{os.getpid()}"
+                    try:
+                        while True:
+                            urls = frontier.claim(owner, batch_size=10)
+                            if not urls:
+                                break
+                            for url in urls:
+                                print(f"Scraping URL: {url}")
+                                try:
+                                    if session is not None:
+                                        result = scrape_page_http(url, session, cache, args.lightweight)
+                                    else:
+                                        result = scrape_browser(url)
+                                except Exception as e:
+                                    print(f"Chyba při scrapování: {str(e)}")
+                                    frontier.fail(url, owner, e)
+                                    continue
+
+                                if result is None:
+                                    frontier.fail(url, owner, "Consent nebo specifikace nenalezeny")
+                                save_result(writer, url, result)
+                                output_csv.flush()
+                                if result is not None:
+                                    frontier.complete(url, owner)
+                        print(f"Stav fronty: {frontier.stats()}")
+                    finally:
+                        frontier.close()
+                else:
+                    for row in csv_reader:
+                        url = row[0]
+                        print(f"Scraping URL: {url}")
+                        if session is not None:
+                            result = scrape_page_http(url, session, cache, args.lightweight)
+                        else:
+                            result = scrape_browser(url)
+
+                        save_result(writer, url, result)
     except FileNotFoundError:
         print(f"Soubor {input_file} nebyl nalezen.")
     except Exception as e:
@@ -0,0 +1,188 @@
+import argparse
+import re
+import time
+import zlib
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Sloupce, které se u duplicit musí shodovat přesně (NaN se rovná NaN)
+AGREEMENT_COLUMNS = ['type', 'material', 'condition', 'frame_size', 'wheel_size', 'front_travel', 'rear_travel']
+
+NON_ALNUM = re.compile(r'[^0-9a-z]+')
+YEAR_PATTERN = re.compile(r'(\d{4})')
+LISTING_ID = re.compile(r'/(\d+)/?$')
+
+
+def normalize_title(title):
+    """"2022 Orange  Crush - like new!" -> "2022 orange crush like new"."""
+    return NON_ALNUM.sub(' ', str(title).lower()).strip()
+
+
+def shingle_hashes(title):
+    """Stabilní (crc32) hashe slov normalizovaného titulku.
+
+    Slova, ne znakové n-gramy: titulky jsou krátké a n-gramy dlouhých
+    společných slov (specialized, stumpjumper) by přebily rozdíl v modelu
+    nebo velikosti (expert/comp, s3/s4).
+    """
+    return np.fromiter({zlib.crc32(word.encode()) for word in title.split()} or {0}, dtype=np.uint64)
+
+
+def _mix(x):
+    """splitmix64 finalizer; uint64 násobení v numpy přetéká modulo 2^64, jak má."""
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def minhash_signatures(titles, num_perm=128, seed=1):
+    """MinHash podpisy (n, num_perm) pro normalizované titulky.
+
+    Shingly všech titulků jsou v jednom plochém poli, minimum přes
+    každý titulek počítá np.minimum.reduceat, takže Python smyčka běží
+    jen přes titulky, ne přes permutace.
+    """
+    shingles = [shingle_hashes(title) for title in titles]
+    lengths = np.array([len(s) for s in shingles])
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    flat = np.concatenate(shingles) if shingles else np.empty(0, dtype=np.uint64)
+
+    salts = np.random.default_rng(seed).integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(titles), num_perm), dtype=np.uint64)
+    for i in range(num_perm):
+        # Lineární (a * x + b) mod p nad 32bitovými crc32 skoro nepřetéká a odhad
+        # Jaccardovy podobnosti pak vychází systematicky vyšší
+        signatures[:, i] = np.minimum.reduceat(_mix(flat ^ salts[i]), offsets) if len(flat) else 0
+    return signatures
+
+
+def _agreement_codes(df):
+    """Celočíselný kód kombinace AGREEMENT_COLUMNS a roku z titulku pro každý řádek."""
+    keys = df.reindex(columns=AGREEMENT_COLUMNS).astype(str)
+    keys['year'] = df['title'].astype(str).str.extract(YEAR_PATTERN, expand=False).astype(str)
+    return pd.MultiIndex.from_frame(keys).factorize()[0]
+
+
+def _band_keys(band):
+    """Jeden uint64 klíč z řádků pásma (násobení a sčítání s přetečením je záměrné)."""
+    multipliers = np.arange(1, band.shape[1] + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    with np.errstate(over='ignore'):
+        return (band * multipliers).sum(axis=1)
+
+
+def find_clusters(df, threshold=0.6, num_perm=128, bands=32, price_tolerance=0.25):
+    """Popisky shluků téměř duplicitních inzerátů a počet kandidátních párů.
+
+    LSH: podpis se rozdělí na `bands` pásem a řádky se shodným pásmem
+    i shodným kódem AGREEMENT_COLUMNS + rok padnou do jednoho bucketu.
+    Každý řádek se porovná jen s prvním členem svého bucketu (odhad
+    Jaccardovy podobnosti z podpisů >= threshold a cena v toleranci),
+    takže počet porovnání roste lineárně. Shluky jsou komponenty
+    souvislosti grafu nalezených párů.
+    """
+    n = len(df)
+    if n == 0:
+        # Prázdný výběr (např. po filtrech v load_and_preprocess); MultiIndex z prázdného rámce nejde sestavit
+        return np.empty(0, dtype=int), 0
+    titles = df['title'].fillna('').map(normalize_title)
+    codes, unique_titles = pd.factorize(titles)
+    # Opakované titulky se hashují jen jednou
+    signatures = minhash_signatures(list(unique_titles), num_perm)[codes]
+    agreement = _agreement_codes(df)
+    prices = df['price'].to_numpy(dtype=float)
+    has_title = titles.to_numpy() != ''
+
+    rows = num_perm // bands
+    agreement_salt = _mix(agreement.astype(np.uint64))
+    pairs = []
+    for band in range(bands):
+        keys = _band_keys(signatures[:, band * rows:(band + 1) * rows]) ^ agreement_salt
+        buckets = pd.factorize(keys)[0]
+        # první řádek každého bucketu je jeho reprezentant
+        first = np.full(buckets.max() + 1 if n else 0, n)
+        np.minimum.at(first, buckets, np.arange(n))
+        representative = first[buckets]
+        members = np.flatnonzero((representative != np.arange(n)) & has_title)
+        pairs.append(members * n + representative[members])
+
+    # Tentýž pár se většinou potká ve více pásmech, ověřuje se jen jednou
+    pairs = np.unique(np.concatenate(pairs)) if pairs else np.empty(0, dtype=int)
+    sources, targets = pairs // n, pairs % n
+    similar = (signatures[sources] == signatures[targets]).mean(axis=1) >= threshold
+    price_ok = np.abs(prices[sources] - prices[targets]) <= price_tolerance * np.maximum(prices[sources], prices[targets])
+    matched = (similar & (agreement[sources] == agreement[targets])
+               & (price_ok | np.isnan(prices[sources]) | np.isnan(prices[targets])))
+    sources, targets = sources[matched], targets[matched]
+    candidates = len(pairs)
+
+    graph = coo_matrix((np.ones(len(sources)), (sources, targets)), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels, candidates
+
+
+def canonical_rows(df, labels):
+    """Jeden řádek za shluk: nejnovější inzerát (nejvyšší ID v URL), jinak poslední řádek."""
+    if 'url' in df.columns:
+        listing_ids = pd.to_numeric(df['url'].astype(str).str.extract(LISTING_ID, expand=False), errors='coerce')
+    else:
+        listing_ids = pd.Series(np.nan, index=df.index)
+    order = pd.DataFrame({
+        'label': labels,
+        'listing_id': listing_ids.fillna(-1).to_numpy(),
+        'position': np.arange(len(df)),
+    })
+    keep = order.sort_values(['label', 'listing_id', 'position']).drop_duplicates('label', keep='last')['position']
+    return df.iloc[np.sort(keep.to_numpy())]
+
+
+def dedup_listings(df, threshold=0.6, num_perm=128, bands=32, price_tolerance=0.25, stats=None):
+    """Inzeráty bez téměř duplicitních re-postů (formát spoj_updated.csv).
+
+    Do stats (dict) se zapíše počet řádků, shluků a kandidátních párů.
+    """
+    if 'url' in df.columns:
+        df = df.drop_duplicates('url', keep='last')
+    labels, candidates = find_clusters(df, threshold, num_perm, bands, price_tolerance)
+    result = canonical_rows(df, labels)
+    if stats is not None:
+        stats.update({
+            'rows_in': len(df),
+            'rows_out': len(result),
+            'clusters_merged': int((np.bincount(labels) > 1).sum()) if len(labels) else 0,
+            'candidate_pairs': int(candidates),
+        })
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Odstranění téměř duplicitních inzerátů (MinHash + LSH)")
+    parser.add_argument("--data", default="spoj_updated.csv")
+    parser.add_argument("--output", help="CSV s kanonickými řádky (jinak jen statistika)")
+    parser.add_argument("--threshold", type=float, default=0.6, help="Minimální odhad Jaccardovy podobnosti titulků")
+    parser.add_argument("--bands", type=int, default=32)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--price-tolerance", type=float, default=0.25, help="Povolený relativní rozdíl cen v jednom shluku")
+    parser.add_argument("--show", type=int, default=0, help="Vypíše titulky několika největších shluků")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    start = time.perf_counter()
+    stats = {}
+    result = dedup_listings(df, args.threshold, args.num_perm, args.bands, args.price_tolerance, stats)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['rows_in']} -> {stats['rows_out']} řádků, {stats['clusters_merged']} shluků duplicit, "
+          f"{stats['candidate_pairs']} kandidátních párů, {elapsed:.2f} s ({stats['rows_in'] / elapsed:,.0f} řádků/s)")
+
+    if args.show:
+        deduped = df.drop_duplicates('url', keep='last') if 'url' in df.columns else df
+        labels, _ = find_clusters(deduped, args.threshold, args.num_perm, args.bands, args.price_tolerance)
+        sizes = pd.Series(labels).value_counts()
+        for label in sizes[sizes > 1].index[:args.show]:
+            print("---")
+            print(deduped.loc[labels == label, ['title', 'price', 'url']].to_string(index=False, header=False))
+
+    if args.output:
+        result.to_csv(args.output, index=False)
+        print(f"Uloženo do {args.output}")
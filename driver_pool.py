@@ -0,0 +1,208 @@
+import json
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from crawl_metrics import timed
+from html_scraper import USER_AGENT
+
+# Požadavky blokované v odlehčeném režimu: obrázky, média, fonty a reklamní/analytické třetí strany
+BLOCKED_URL_PATTERNS = (
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.svg*", "*.ico*",
+    "*.mp4*", "*.webm*", "*.mp3*", "*.woff*", "*.ttf*", "*.otf*",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*adservice.google.*", "*amazon-adsystem.com*",
+    "*facebook.net*", "*hotjar.com*",
+)
+CONSENT_PROFILE = "consent_profile.json"
+
+
+def build_chrome_options(headless=True, lightweight=False):
+    """Nastavení Chrome společné pro všechny drivery v poolu.
+
+    V odlehčeném režimu se čeká jen na DOMContentLoaded (eager)
+    a obrázky se vůbec nenačítají.
+    """
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument(f"user-agent={USER_AGENT}")
+    if lightweight:
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return chrome_options
+
+
+def load_consent_cookies(path=CONSENT_PROFILE):
+    """Uložené consent cookies, prázdný seznam pokud profil ještě neexistuje."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_consent_cookies(driver, path=CONSENT_PROFILE):
+    """Uloží cookies po přijetí consentu, další drivery je dostanou předem."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(driver.get_cookies(), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def enable_lightweight(driver, cookies=()):
+    """Zablokuje nepotřebné požadavky přes CDP a předem nastaví consent cookies.
+
+    Vrací True, pokud byly cookies nastavené a consent modal se nemá zobrazit.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+    for cookie in cookies:
+        params = {key: cookie[key] for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite") if key in cookie}
+        if "expiry" in cookie:
+            params["expires"] = cookie["expiry"]
+        driver.execute_cdp_cmd("Network.setCookie", params)
+    return bool(cookies)
+
+
+class PooledDriver:
+    """Chrome driver vypůjčený z poolu i se stavem jeho session."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.consent_accepted = False
+        self.consent_seeded = False
+        self.broken = False
+
+
+class DriverPool:
+    """Pool dlouho žijících headless Chrome driverů sdílený mezi vlákny.
+
+    Cesta k chromedriveru se zjišťuje jen jednou, drivery se vytvářejí
+    líně až do velikosti poolu a po max_pages stránkách nebo po pádu
+    se zavřou a nahradí novými.
+    S lightweight=True drivery blokují obrázky, média a třetí strany
+    a dostanou consent cookies z consent_profile; první přijatý consent
+    se do profilu uloží.
+    """
+
+    def __init__(self, size=5, max_pages=200, headless=True, metrics=None, lightweight=False, consent_profile=CONSENT_PROFILE):
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.metrics = metrics
+        self.lightweight = lightweight
+        self.consent_profile = consent_profile
+        self._consent_saved = False
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._path_lock = threading.Lock()
+        self._created = 0
+        self._driver_path = None
+        self._closed = False
+
+    def _resolve_driver_path(self):
+        with self._path_lock:
+            if self._driver_path is None:
+                self._driver_path = ChromeDriverManager().install()
+            return self._driver_path
+
+    def _start_driver(self):
+        with timed(self.metrics, "driver_startup"):
+            driver = webdriver.Chrome(
+                service=Service(self._resolve_driver_path()),
+                options=build_chrome_options(self.headless, self.lightweight)
+            )
+            pooled = PooledDriver(driver)
+            if self.lightweight:
+                seeded = enable_lightweight(driver, load_consent_cookies(self.consent_profile))
+                pooled.consent_accepted = pooled.consent_seeded = seeded
+        return pooled
+
+    def acquire(self):
+        """Vrátí volný driver, případně nastartuje nový, dokud není pool plný."""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_start = self._created < self.size
+                if can_start:
+                    self._created += 1
+
+            if can_start:
+                try:
+                    return self._start_driver()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            # Pool je plný, počkej na vrácený driver (nebo na uvolněné místo po recyklaci)
+            try:
+                with timed(self.metrics, "pool_wait"):
+                    return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def release(self, pooled):
+        """Vrátí driver do poolu, nebo ho zavře, pokud je rozbitý či opotřebovaný."""
+        pooled.pages += 1
+        if self.lightweight and self.consent_profile and pooled.consent_accepted and not pooled.consent_seeded:
+            self._remember_consent(pooled)
+        if self._closed or pooled.broken or pooled.pages >= self.max_pages:
+            self._discard(pooled)
+        else:
+            self._idle.put(pooled)
+
+    def _remember_consent(self, pooled):
+        with self._lock:
+            if self._consent_saved:
+                return
+            self._consent_saved = True
+        try:
+            save_consent_cookies(pooled.driver, self.consent_profile)
+        except Exception as e:
+            print(f"Consent cookies se nepodařilo uložit: {str(e)}")
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            print(f"Chyba při zavírání driveru: {str(e)}")
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def driver(self):
+        """Zapůjčí driver na jednu stránku; po pádu prohlížeče ho recykluje."""
+        pooled = self.acquire()
+        try:
+            yield pooled
+        except (TimeoutException, NoSuchElementException):
+            raise
+        except WebDriverException:
+            pooled.broken = True
+            raise
+        finally:
+            self.release(pooled)
+
+    def close(self):
+        """Zavře všechny nečinné drivery."""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(pooled)
@@ -0,0 +1,184 @@
+import argparse
+import math
+import re
+import time
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from dedup import normalize_title
+from ingest import load_specs
+
+# Sloupce ze specifikací, které join přidá k inzerátům (a train.py --specs použije jako featury)
+SPEC_NUMERIC_FEATURES = ['spec_msrp']
+SPEC_CATEGORICAL_FEATURES = ['spec_frame_material', 'spec_wheel_size']
+SPEC_FEATURES = SPEC_NUMERIC_FEATURES + SPEC_CATEGORICAL_FEATURES
+
+# Varianty značek v titulcích inzerátů -> název značky jako na mtbdatabase.com
+BRAND_ALIASES = {
+    'specialised': 'specialized',
+    'santacruz': 'santa cruz',
+    'yt industries': 'yt',
+    'rocky mtn': 'rocky mountain',
+}
+YEAR_TOKEN = re.compile(r'^(19|20)\d{2}$')
+
+
+class SpecIndex:
+    """Invertovaný index modelových slov specifikací, rozdělený do bloků podle značky.
+
+    Inzerát se porovná jen se specifikacemi své značky, které obsahují
+    název jeho modelu a jejichž rok se liší nejvýš o year_window.
+    Skóre je Diceův koeficient vážený IDF v rámci bloku; slova, která se
+    ve specifikacích značky nevyskytují (velikost, "like new"), se do
+    něj nepočítají.
+    """
+
+    def __init__(self, specs, year_window=3, year_penalty=0.02):
+        self.specs = specs.reset_index(drop=True)
+        self.year_window = year_window
+        self.year_penalty = year_penalty
+        self.scored = 0
+        self.years = pd.to_numeric(self.specs['year'], errors='coerce').to_numpy(dtype=float)
+
+        brands = self.specs['brand'].astype(object).fillna('').astype(str).str.replace('-', ' ').str.lower()
+        self.brands = {brand for brand in brands if brand}
+        titles = [normalize_title(title).split() for title in self.specs['title'].fillna('')]
+
+        self.spec_brands = []
+        postings = defaultdict(lambda: defaultdict(list))
+        self.models = []
+        for i, (brand, tokens) in enumerate(zip(brands, titles)):
+            if not brand:
+                # Bez značky v datech: nejdelší známá značka na začátku titulku, jinak první slovo
+                brand, _ = self.find_brand(tokens[:3])
+                brand = brand or (tokens[0] if tokens else '')
+            self.spec_brands.append(brand)
+            model = set(tokens) - set(brand.split())
+            self.models.append(model)
+            for token in model:
+                postings[brand][token].append(i)
+
+        self.postings = {brand: dict(tokens) for brand, tokens in postings.items()}
+        self.idf = {}
+        for brand, tokens in self.postings.items():
+            size = len({i for ids in tokens.values() for i in ids})
+            self.idf[brand] = {token: math.log(1 + size / len(ids)) for token, ids in tokens.items()}
+        self.weights = np.array([
+            sum(self.idf[brand][token] for token in model) for brand, model in zip(self.spec_brands, self.models)
+        ])
+
+    def find_brand(self, tokens):
+        """(značka, index slova za ní) podle nejdelšího n-gramu titulku, který je známou značkou."""
+        for n in (3, 2, 1):
+            for start in range(len(tokens) - n + 1):
+                candidate = ' '.join(tokens[start:start + n])
+                brand = BRAND_ALIASES.get(candidate, candidate)
+                if brand in self.brands:
+                    return brand, start + n
+        return None, 0
+
+    def match(self, title):
+        """(index specifikace, skóre) pro titulek inzerátu; (-1, 0.0) bez kandidáta.
+
+        Kandidáti jsou specifikace značky, které obsahují název modelu
+        (první slovo z písmen za značkou), např. "habit" u "2024 Cannondale
+        Habit 4"; bez něj by se páry skládaly jen ze shodných čísel výbavy.
+        """
+        tokens = normalize_title(title).split()
+        years = [int(token) for token in tokens if YEAR_TOKEN.match(token)]
+        year = years[0] if years else None
+        brand, brand_end = self.find_brand(tokens)
+        if brand not in self.postings:
+            return -1, 0.0
+
+        idf = self.idf[brand]
+        model_name = next((token for token in tokens[brand_end:] if token.isalpha()), None)
+        if model_name not in idf:
+            return -1, 0.0
+        query = {token for token in tokens[brand_end:] if token in idf}
+        query_weight = sum(idf[token] for token in query)
+
+        best, best_score = -1, 0.0
+        self.scored += len(self.postings[brand][model_name])
+        for i in self.postings[brand][model_name]:
+            distance = abs(self.years[i] - year) if year is not None and not np.isnan(self.years[i]) else 0
+            if distance > self.year_window:
+                continue
+            shared = sum(idf[token] for token in query & self.models[i])
+            score = 2 * shared / (self.weights[i] + query_weight) - self.year_penalty * distance
+            if score > best_score:
+                best, best_score = i, score
+        return best, best_score
+
+
+def join_specs(listings, specs, min_score=0.5, year_window=3, stats=None):
+    """Inzeráty doplněné o spec_ sloupce nejpravděpodobnější specifikace kola.
+
+    specs je typovaný výstup ingest.load_specs. Každý unikátní titulek se
+    páruje jen jednou. Do stats (dict) se zapíše počet spárovaných
+    inzerátů a rychlost.
+    """
+    start = time.perf_counter()
+    index = SpecIndex(specs, year_window)
+    codes, titles = pd.factorize(listings['title'].fillna(''))
+    matches = [index.match(title) for title in titles]
+    spec_ids = np.array([i for i, _ in matches], dtype=int)[codes] if matches else np.empty(0, dtype=int)
+    scores = np.array([score for _, score in matches])[codes] if matches else np.empty(0)
+    spec_ids[scores < min_score] = -1
+
+    matched = spec_ids >= 0
+    columns = {
+        'spec_url': index.specs['url'],
+        'spec_score': None,
+        'spec_msrp': index.specs['price'].astype(float),
+        'spec_frame_material': index.specs['frame_material'].astype(object),
+        'spec_wheel_size': index.specs['wheel_size'].astype(object),
+    }
+    result = listings.copy()
+    for name, values in columns.items():
+        if values is None:
+            column = np.where(matched, scores, np.nan)
+        else:
+            column = np.full(len(listings), np.nan, dtype=object if values.dtype == object else float)
+            column[matched] = values.to_numpy()[spec_ids[matched]]
+        result[name] = column
+
+    if stats is not None:
+        seconds = time.perf_counter() - start
+        stats.update({
+            'listings': len(listings),
+            'unique_titles': len(titles),
+            'matched': int(matched.sum()),
+            'scored_pairs': index.scored,
+            'cross_product': len(titles) * len(index.specs),
+            'seconds': round(seconds, 3),
+            'listings_per_sec': round(len(listings) / seconds, 1) if seconds else None,
+        })
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Párování inzerátů (spoj_updated.csv) se specifikacemi kol (scraped.csv)")
+    parser.add_argument("--listings", default="spoj_updated.csv")
+    parser.add_argument("--specs", default="scraped.csv")
+    parser.add_argument("--output", help="CSV s inzeráty doplněnými o spec_ sloupce")
+    parser.add_argument("--min-score", type=float, default=0.5)
+    parser.add_argument("--year-window", type=int, default=3, help="Maximální rozdíl modelového roku inzerátu a specifikace")
+    parser.add_argument("--show", type=int, default=0, help="Vypíše několik spárovaných titulků")
+    args = parser.parse_args()
+
+    listings = pd.read_csv(args.listings)
+    stats = {}
+    joined = join_specs(listings, load_specs(args.specs), args.min_score, args.year_window, stats)
+    print(f"Spárováno {stats['matched']}/{stats['listings']} inzerátů za {stats['seconds']} s "
+          f"({stats['listings_per_sec']:,.0f} inzerátů/s)")
+
+    if args.show:
+        specs = pd.read_csv(args.specs, usecols=['url', 'title']).set_index('url')['title']
+        sample = joined[joined['spec_url'].notna()].head(args.show)
+        for _, row in sample.iterrows():
+            print(f"{row['spec_score']:.2f}  {row['title']}  ->  {specs.get(row['spec_url'])}")
+
+    if args.output:
+        joined.to_csv(args.output, index=False)
+        print(f"Uloženo do {args.output}")
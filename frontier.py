@@ -0,0 +1,132 @@
+import csv
+import json
+import os
+import sqlite3
+import time
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Frontier:
+    """Perzistentní fronta URL v SQLite se stavem každé URL.
+
+    Stavy: pending -> leased -> done / failed. Worker si zabere dávku
+    URL s lease timeoutem, a pokud do jeho vypršení dávku nedokončí
+    (pád, restart), URL se vrátí zpět k dispozici dalším workerům.
+    """
+
+    def __init__(self, db_path, lease_seconds=600, max_attempts=3):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                updated_at REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_frontier_state ON frontier (state, lease_expires)")
+
+    def close(self):
+        self.conn.close()
+
+    def add_urls(self, urls):
+        """Přidá nové URL jako pending, už známé URL nechá beze změny."""
+        now = time.time()
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier (url, updated_at) VALUES (?, ?)",
+            ((url, now) for url in urls)
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def add_from_csv(self, input_file):
+        """Načte URL z prvního sloupce CSV (s hlavičkou)."""
+        with open(input_file, mode='r') as file:
+            csv_reader = csv.reader(file)
+            next(csv_reader)  # Přeskočí hlavičku
+            return self.add_urls(row[0] for row in csv_reader if row)
+
+    def claim(self, owner, batch_size=10):
+        """Zabere dávku URL pro workera `owner` a vrátí jejich seznam.
+
+        Bere pending URL, URL s propadlým leasem a neúspěšné URL,
+        které ještě nevyčerpaly max_attempts pokusů.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.conn.execute("""
+                SELECT url FROM frontier
+                WHERE state = 'pending'
+                   OR (state = 'leased' AND lease_expires < ?)
+                   OR (state = 'failed' AND attempts < ?)
+                LIMIT ?
+            """, (now, self.max_attempts, batch_size)).fetchall()
+            urls = [row[0] for row in rows]
+            self.conn.executemany("""
+                UPDATE frontier
+                SET state = 'leased', attempts = attempts + 1,
+                    lease_owner = ?, lease_expires = ?, updated_at = ?
+                WHERE url = ?
+            """, ((owner, now + self.lease_seconds, now, url) for url in urls))
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return urls
+
+    def complete(self, url, owner, result=None):
+        """Označí URL jako hotovou a uloží k ní výsledek scrapování."""
+        cursor = self.conn.execute("""
+            UPDATE frontier
+            SET state = 'done', result = ?, last_error = NULL,
+                lease_owner = NULL, lease_expires = NULL, updated_at = ?
+            WHERE url = ? AND state = 'leased' AND lease_owner = ?
+        """, (json.dumps(result) if result is not None else None, time.time(), url, owner))
+        return cursor.rowcount == 1
+
+    def fail(self, url, owner, error):
+        """Označí URL jako neúspěšnou s poslední chybou."""
+        cursor = self.conn.execute("""
+            UPDATE frontier
+            SET state = 'failed', last_error = ?,
+                lease_owner = NULL, lease_expires = NULL, updated_at = ?
+            WHERE url = ? AND state = 'leased' AND lease_owner = ?
+        """, (str(error), time.time(), url, owner))
+        return cursor.rowcount == 1
+
+    def stats(self):
+        """Počty URL v jednotlivých stavech."""
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"):
+            counts[state] = count
+        return counts
+
+    def results(self):
+        """Uložené výsledky všech hotových URL."""
+        for (result,) in self.conn.execute("SELECT result FROM frontier WHERE state = 'done' AND result IS NOT NULL ORDER BY url"):
+            yield json.loads(result)
+
+    def export_csv(self, output_file, fieldnames):
+        """Zapíše všechny hotové výsledky do CSV (přepíše ho celý)."""
+        tmp_file = output_file + ".tmp"
+        with open(tmp_file, mode='w', newline='', encoding='utf-8') as output_csv:
+            writer = csv.DictWriter(output_csv, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for result in self.results():
+                writer.writerow(result)
+        os.replace(tmp_file, output_file)
@@ -0,0 +1,132 @@
+import gzip
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class HtmlCache:
+    """Obsahově adresovaná cache surového HTML na disku.
+
+    Stránky leží v objects/<2 znaky>/<sha256>.html.gz, index.db mapuje
+    URL na hash obsahu, kódování surových bytes a validátory (ETag,
+    Last-Modified) pro podmíněné požadavky. Stejný obsah pod více URL
+    se uloží jen jednou.
+    """
+
+    def __init__(self, root="html_cache"):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL,
+                validated_at REAL,
+                charset TEXT
+            )
+        """)
+        # index.db z doby před sloupcem charset
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+        if 'charset' not in columns:
+            self.conn.execute("ALTER TABLE pages ADD COLUMN charset TEXT")
+
+    def close(self):
+        self.conn.close()
+
+    def _object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ".html.gz")
+
+    def lookup(self, url):
+        """Záznam pro URL jako dict, nebo None, pokud URL v cache není."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sha256, etag, last_modified, charset FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'sha256': row[0], 'etag': row[1], 'last_modified': row[2], 'charset': row[3]}
+
+    def conditional_headers(self, url):
+        """Hlavičky If-None-Match / If-Modified-Since pro revalidaci URL."""
+        entry = self.lookup(url)
+        headers = {}
+        if entry is None or not os.path.exists(self._object_path(entry['sha256'])):
+            return headers
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read(self, sha256, raw=False, charset=None):
+        """Obsah objektu; bez raw dekódovaný podle charset (neznámé kódování jako UTF-8)."""
+        with gzip.open(self._object_path(sha256), "rb") as f:
+            data = f.read()
+        if raw:
+            return data
+        try:
+            return data.decode(charset or "utf-8", errors="replace")
+        except LookupError:
+            return data.decode("utf-8", errors="replace")
+
+    def get(self, url, raw=False):
+        """Uložené HTML pro URL (s raw jako bytes), nebo None."""
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        return self.read(entry['sha256'], raw, entry['charset'])
+
+    def store(self, url, html, etag=None, last_modified=None, charset=None):
+        """Uloží HTML (str nebo bytes, pokud takový obsah ještě nemáme) a přemapuje URL.
+
+        charset je kódování bytes z hlavičky Content-Type; str se ukládá jako UTF-8.
+        """
+        if isinstance(html, bytes):
+            data = html
+        else:
+            data, charset = html.encode("utf-8"), "utf-8"
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._object_path(sha256)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute("""
+                INSERT INTO pages (url, sha256, etag, last_modified, fetched_at, validated_at, charset)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    sha256 = excluded.sha256, etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    fetched_at = excluded.fetched_at, validated_at = excluded.validated_at,
+                    charset = excluded.charset
+            """, (url, sha256, etag, last_modified, now, now, charset))
+        return sha256
+
+    def mark_validated(self, url):
+        """Zaznamená odpověď 304, obsah v cache je stále aktuální."""
+        with self._lock:
+            self.conn.execute("UPDATE pages SET validated_at = ? WHERE url = ?", (time.time(), url))
+
+    def urls(self):
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT url FROM pages ORDER BY url")]
+
+    def iter_pages(self, raw=False):
+        """Projde všechny uložené stránky jako (url, html) bez přístupu k síti."""
+        for url in self.urls():
+            html = self.get(url, raw)
+            if html is not None:
+                yield url, html
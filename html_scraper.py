@@ -0,0 +1,114 @@
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
+
+# Jediná definice, importují ji driver_pool, async_fetch i craw2
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36"
+
+
+def create_session(pool_size=10):
+    """Vytvoří requests.Session se sdíleným poolem keep-alive spojení."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"User-Agent": USER_AGENT})
+    return session
+
+
+def fetch_html(url, session, timeout=15, cache=None, raw=False):
+    """Stáhne surové HTML stránky bez prohlížeče.
+
+    S HtmlCache pošle podmíněný požadavek (ETag / Last-Modified),
+    při odpovědi 304 vrátí HTML z cache a nové stránky do ní uloží.
+    S raw vrátí stránku jako bytes (a do cache uloží bytes) a dekódování
+    nechá na parseru, tedy na procesu parsování, ne na vláknu stahování.
+    """
+    headers = cache.conditional_headers(url) if cache is not None else {}
+    response = session.get(url, timeout=timeout, headers=headers)
+
+    if cache is not None and response.status_code == 304 and headers:
+        cache.mark_validated(url)
+        return cache.get(url, raw)
+
+    response.raise_for_status()
+    if cache is not None:
+        # Kódování jen z hlavičky; bez něj ho z bytes pozná až parser (meta charset)
+        charset = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+        cache.store(url, response.content if raw else response.text,
+                    response.headers.get('ETag'), response.headers.get('Last-Modified'), charset)
+    return response.content if raw else response.text
+
+
+def _text(element):
+    """Text elementu s normalizovanými mezerami (jako Selenium .text)."""
+    if element is None:
+        return None
+    return " ".join(element.get_text(" ").split())
+
+
+def is_product_element(name, attrs=None):
+    """Element, jehož podstrom parse_product_html potřebuje.
+
+    Jde o h1, #final_price, blok s rokem (div.col-md-5.col-12) a
+    section.specifications.
+    """
+    attrs = attrs or {}
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    if name == 'h1' or attrs.get('id') == 'final_price':
+        return True
+    if name == 'div':
+        return 'col-md-5' in classes and 'col-12' in classes
+    return name == 'section' and 'specifications' in classes
+
+
+class ProductStrainer(SoupStrainer):
+    """SoupStrainer, který při parsování vytvoří jen elementy podle is_product_element.
+
+    Starší bs4 volá funkci z konstruktoru se jménem a atributy tagu.
+    bs4 >= 4.13 jí předá jen jméno, proto se atributy kontrolují
+    v allow_tag_creation.
+    """
+
+    def __init__(self):
+        super().__init__(is_product_element)
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return is_product_element(name, attrs)
+
+
+PRODUCT_STRAINER = ProductStrainer()
+
+
+def parse_product_html(html, strainer=PRODUCT_STRAINER):
+    """Vytáhne název, cenu, rok a řádky specifikací ze statického HTML (str nebo bytes).
+
+    Strom se staví jen z částí stránky, které propustí strainer
+    (None = celý dokument). Vrací None, pokud HTML neobsahuje
+    section.specifications a stránku je potřeba vyrenderovat v prohlížeči.
+    """
+    soup = BeautifulSoup(html, 'html.parser', parse_only=strainer)
+
+    specs_section = soup.find('section', class_='specifications')
+    if specs_section is None:
+        return None
+
+    page = {
+        'title': _text(soup.find('h1')),
+        'price': _text(soup.find(id='final_price')),
+        'year': _text(soup.select_one('div.col-md-5.col-12 > b')),
+        'specs': []
+    }
+
+    # Dvojice (label, value) ve stejném tvaru jako v Selenium cestě;
+    # find místo CSS selektorů, soupsieve na každém řádku stál polovinu parsování
+    for item in specs_section.find_all(class_='list-group-item'):
+        label = item.find(class_='font-weight-bold')
+        value = item.find(class_='text-muted')
+        if label is None or value is None:
+            continue
+        page['specs'].append((_text(label).lower(), _text(value).lower()))
+
+    return page
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import pickle
+import time
+import pandas as pd
+
+FORMAT_VERSION = 1
+DEFAULT_SOURCE = "scraped.csv"
+DEFAULT_CACHE_DIR = ".ingest_cache"
+
+CATEGORY_COLUMNS = ['brand', 'frame_material', 'wheel_size', 'drivetrain_brand', 'fork_brand', 'fork_model',
+                    'fork_damper', 'shock_brand', 'shock_model']
+MM_COLUMNS = ['fork_travel', 'fork_offset', 'shock_length', 'shock_stroke']
+# crawler.py zapisuje chybějící hodnoty jako 'None'
+NA_VALUES = ['', 'None', 'none', 'nan']
+
+
+def parse_price(prices):
+    """"$4,999.00" -> 4999.0 jako float32."""
+    cleaned = prices.astype(str).str.replace(r'[^\d.]', '', regex=True)
+    return pd.to_numeric(cleaned, errors='coerce').astype('float32')
+
+
+def parse_mm(values):
+    """"160mm", "160.0" i 160 -> nullable Int16."""
+    numbers = values.astype(str).str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+    return pd.to_numeric(numbers, errors='coerce').round().astype('Int16')
+
+
+def typed_specs(df):
+    """Převede surový výstup crawleru (všechno stringy) na kompaktní typované sloupce."""
+    df = df.copy()
+    df['price'] = parse_price(df['price'])
+    df['year'] = pd.to_numeric(df['year'], errors='coerce').astype('Int16')
+    df['wheel_size_in'] = pd.to_numeric(
+        df['wheel_size'].astype(str).str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce'
+    ).astype('float32')
+    for col in MM_COLUMNS:
+        df[col] = parse_mm(df[col])
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype('category')
+    return df
+
+
+def _source_signature(source):
+    stat = os.stat(source)
+    return {'source': os.path.abspath(source), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'format_version': FORMAT_VERSION}
+
+
+def _cache_paths(source, cache_dir):
+    name = os.path.basename(source)
+    return os.path.join(cache_dir, name + ".meta.json"), os.path.join(cache_dir, name)
+
+
+def _binary_format():
+    """Feather (sloupcový formát Arrow), bez pyarrow pickle."""
+    try:
+        import pyarrow.feather  # noqa: F401
+        return "feather"
+    except ImportError:
+        return "pickle"
+
+
+def write_cache(df, source, cache_dir=DEFAULT_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    meta_path, data_path = _cache_paths(source, cache_dir)
+    meta = dict(_source_signature(source), format=_binary_format())
+    data_file = f"{data_path}.{meta['format']}"
+    if meta['format'] == "feather":
+        df.reset_index(drop=True).to_feather(data_file + ".tmp")
+    else:
+        with open(data_file + ".tmp", "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(data_file + ".tmp", data_file)
+    # Metadata se zapisují až po datech, neúplná cache se tak nikdy nepoužije
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+def read_cache(source, cache_dir=DEFAULT_CACHE_DIR):
+    """Typovaný DataFrame z cache, None pokud cache chybí nebo je zdroj novější."""
+    meta_path, data_path = _cache_paths(source, cache_dir)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding="utf-8") as f:
+        meta = json.load(f)
+    if {key: meta.get(key) for key in _source_signature(source)} != _source_signature(source):
+        return None
+
+    data_file = f"{data_path}.{meta['format']}"
+    if meta['format'] == "feather":
+        return pd.read_feather(data_file)
+    with open(data_file, "rb") as f:
+        return pickle.load(f)
+
+
+def load_specs(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR, refresh=False):
+    """Typované specifikace kol; CSV se parsuje jen při změně zdroje."""
+    if not refresh:
+        df = read_cache(source, cache_dir)
+        if df is not None:
+            return df
+    df = typed_specs(pd.read_csv(source, dtype=str, na_values=NA_VALUES, keep_default_na=False))
+    write_cache(df, source, cache_dir)
+    return df
+
+
+def _measure(func):
+    start = time.perf_counter()
+    df = func()
+    return df, time.perf_counter() - start
+
+
+def report(source=DEFAULT_SOURCE, cache_dir=DEFAULT_CACHE_DIR):
+    """Paměť a doba načtení: prosté pd.read_csv, ingest bez cache a načtení z cache."""
+    rows = []
+    for name, func in (
+        ("pd.read_csv", lambda: pd.read_csv(source)),
+        ("ingest (parsování CSV)", lambda: load_specs(source, cache_dir, refresh=True)),
+        ("ingest (z cache)", lambda: load_specs(source, cache_dir)),
+    ):
+        df, seconds = _measure(func)
+        rows.append({
+            'způsob': name,
+            'řádků': len(df),
+            'načtení_ms': round(seconds * 1000, 2),
+            'paměť_MB': round(df.memory_usage(deep=True).sum() / 2**20, 2),
+        })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Typovaný ingest výstupu crawleru s binární cache")
+    parser.add_argument("--source", default=DEFAULT_SOURCE)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--refresh", action="store_true", help="Přeparsuje CSV i při platné cache")
+    parser.add_argument("--report", action="store_true", help="Porovná paměť a dobu načtení s pd.read_csv")
+    args = parser.parse_args()
+
+    if args.report:
+        print(report(args.source, args.cache_dir).to_string(index=False))
+    else:
+        df, seconds = _measure(lambda: load_specs(args.source, args.cache_dir, args.refresh))
+        print(f"{len(df)} řádků za {seconds * 1000:.1f} ms")
+        print(df.dtypes.to_string())
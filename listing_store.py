@@ -0,0 +1,209 @@
+import argparse
+import csv
+import math
+import re
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB = "bikeest.db"
+
+# Sloupce a jejich SQLite typy; url je primární klíč v obou tabulkách
+LISTING_COLUMNS = {
+    'url': 'TEXT', 'title': 'TEXT', 'type': 'TEXT', 'condition': 'REAL', 'frame_size': 'REAL',
+    'wheel_size': 'TEXT', 'material': 'TEXT', 'front_travel': 'REAL', 'rear_travel': 'REAL',
+    'price': 'REAL', 'year': 'INTEGER',
+}
+SPEC_COLUMNS = {
+    'url': 'TEXT', 'title': 'TEXT', 'price': 'TEXT', 'year': 'INTEGER', 'brand': 'TEXT',
+    'frame_material': 'TEXT', 'wheel_size': 'TEXT', 'drivetrain_brand': 'TEXT',
+    'fork_brand': 'TEXT', 'fork_model': 'TEXT', 'fork_travel': 'INTEGER', 'fork_damper': 'TEXT',
+    'fork_offset': 'INTEGER', 'shock_brand': 'TEXT', 'shock_model': 'TEXT',
+    'shock_length': 'INTEGER', 'shock_stroke': 'INTEGER',
+}
+TABLES = {'listings': LISTING_COLUMNS, 'specs': SPEC_COLUMNS}
+INDEXES = {
+    'listings': (('type',), ('year',)),
+    'specs': (('brand', 'year'), ('year',)),
+}
+# Sloupce inzerátů ve stejném pořadí jako spoj_updated.csv
+LISTING_CSV_COLUMNS = ['title', 'type', 'condition', 'frame_size', 'wheel_size', 'material', 'front_travel', 'rear_travel', 'price', 'url']
+
+YEAR_PATTERN = re.compile(r'(\d{4})')
+# Úvodní číslo hodnoty s jednotkou ("160mm", "45 mm stroke") jako v spec_extract
+LEADING_NUMBER = re.compile(r'(\d+)')
+
+
+def _clean(value, sql_type):
+    """Prázdné hodnoty ('', 'None', NaN) -> NULL, čísla na typ sloupce.
+
+    INTEGER sloupce z textu s jednotkou vezmou úvodní číslo ("160mm" -> 160).
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        if value in ('', 'None', 'nan'):
+            return None
+    if sql_type == 'TEXT':
+        return str(value)
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        match = LEADING_NUMBER.match(value) if (sql_type == 'INTEGER' and isinstance(value, str)) else None
+        return int(match.group(1)) if match else None
+    return int(number) if sql_type == 'INTEGER' else number
+
+
+def detect_kind(columns):
+    """Podle hlavičky rozliší inzeráty (spoj_updated.csv) a specifikace (scraped.csv)."""
+    columns = set(columns)
+    if 'condition' in columns:
+        return 'listings'
+    if 'frame_material' in columns:
+        return 'specs'
+    raise ValueError(f"Neznámý formát sloupců: {sorted(columns)}")
+
+
+class ListingStore:
+    """Jedno SQLite úložiště inzerátů a specifikací kol místo samostatných CSV.
+
+    Každý záznam je pod svou URL (primární klíč). upsert přepíše řádek
+    a posune updated_at jen tehdy, když se některá hodnota opravdu změnila.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        for table, columns in TABLES.items():
+            definitions = ", ".join(
+                f"{name} {sql_type} PRIMARY KEY" if name == 'url' else f"{name} {sql_type}"
+                for name, sql_type in columns.items()
+            )
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definitions}, updated_at REAL NOT NULL)")
+            for index_columns in INDEXES[table]:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(index_columns)} ON {table} ({', '.join(index_columns)})"
+                )
+
+    def close(self):
+        self.conn.close()
+
+    def upsert(self, table, records):
+        """Vloží nebo aktualizuje záznamy (dicty) podle url, vrací počet změněných řádků."""
+        columns = TABLES[table]
+        names = list(columns)
+        values = [name for name in names if name != 'url']
+        sql = (
+            f"INSERT INTO {table} ({', '.join(names)}, updated_at) VALUES ({', '.join('?' * (len(names) + 1))}) "
+            f"ON CONFLICT(url) DO UPDATE SET {', '.join(f'{name} = excluded.{name}' for name in values)}, "
+            f"updated_at = excluded.updated_at "
+            f"WHERE ({', '.join(values)}) IS NOT ({', '.join(f'excluded.{name}' for name in values)})"
+        )
+        now = time.time()
+        rows = []
+        for record in records:
+            record = dict(record)
+            if table == 'listings' and record.get('year') is None:
+                match = YEAR_PATTERN.search(str(record.get('title') or ''))
+                record['year'] = match.group(1) if match else None
+            row = [_clean(record.get(name), sql_type) for name, sql_type in columns.items()]
+            if row[0] is not None:
+                rows.append(row + [now])
+
+        with self._lock:
+            before = self.conn.total_changes
+            self.conn.execute("BEGIN")
+            self.conn.executemany(sql, rows)
+            self.conn.execute("COMMIT")
+            return self.conn.total_changes - before
+
+    def upsert_listings(self, records):
+        return self.upsert('listings', records)
+
+    def upsert_specs(self, records):
+        return self.upsert('specs', records)
+
+    def import_csv(self, path, kind=None, batch_size=10_000):
+        """Načte CSV (inzeráty nebo specifikace) po dávkách, vrací (tabulka, změněné řádky)."""
+        changed = 0
+        with open(path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames is None:
+                return kind, 0
+            kind = kind or detect_kind(reader.fieldnames)
+            batch = []
+            for record in reader:
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    changed += self.upsert(kind, batch)
+                    batch.clear()
+            if batch:
+                changed += self.upsert(kind, batch)
+        return kind, changed
+
+    def _select(self, table, columns, filters=None, updated_since=None):
+        """SELECT s rovností / IN podle filtrů; názvy sloupců se ověřují proti schématu."""
+        clauses, params = [], []
+        for name, value in (filters or {}).items():
+            if name not in TABLES[table]:
+                raise ValueError(f"Neznámý sloupec {name} v tabulce {table}")
+            if isinstance(value, (list, tuple, set)):
+                clauses.append(f"{name} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        if updated_since is not None:
+            clauses.append("updated_at >= ?")
+            params.append(updated_since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return f"SELECT {', '.join(columns)} FROM {table}{where} ORDER BY rowid", params
+
+    def query_listings(self, filters=None, updated_since=None):
+        """Inzeráty jako DataFrame se sloupci a typy jako při čtení spoj_updated.csv."""
+        # pandas až tady: scraper (craw2) úložiště jen plní a import pandas by mu prodloužil start
+        import pandas as pd
+        sql, params = self._select('listings', LISTING_CSV_COLUMNS, filters, updated_since)
+        with self._lock:
+            df = pd.read_sql_query(sql, self.conn, params=params)
+        for name in LISTING_CSV_COLUMNS:
+            if LISTING_COLUMNS[name] == 'REAL':
+                df[name] = df[name].astype('float32')
+        return df
+
+    def query_specs(self, filters=None, updated_since=None):
+        import pandas as pd
+        sql, params = self._select('specs', list(SPEC_COLUMNS), filters, updated_since)
+        with self._lock:
+            return pd.read_sql_query(sql, self.conn, params=params)
+
+    def stats(self):
+        with self._lock:
+            return {table: self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite úložiště inzerátů a specifikací kol")
+    parser.add_argument("--db", default=DEFAULT_DB)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="Upsert záznamů z CSV souborů")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--kind", choices=list(TABLES), help="Typ záznamů (jinak podle hlavičky)")
+
+    subparsers.add_parser("stats", help="Počty záznamů v tabulkách")
+
+    args = parser.parse_args()
+    store = ListingStore(args.db)
+    try:
+        if args.command == "import":
+            for path in args.files:
+                start = time.perf_counter()
+                kind, changed = store.import_csv(path, args.kind)
+                print(f"{path}: {changed} změněných řádků v {kind}, {time.perf_counter() - start:.2f} s")
+        print(store.stats())
+    finally:
+        store.close()
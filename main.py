@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import re
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler, OneHotEncoder, FunctionTransformer
 from sklearn.compose import ColumnTransformer
@@ -10,14 +9,31 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 
 
-def load_and_preprocess(filepath):
-    df = pd.read_csv(filepath)
+# Typy sloupců při načítání, aby numerické sloupce nebyly float64/object
+CSV_DTYPES = {
+    'type': str,
+    'condition': 'float32',
+    'frame_size': 'float32',
+    'material': str,
+    'front_travel': 'float32',
+    'rear_travel': 'float32',
+    'price': 'float32',
+}
 
-    # Filtrace extrémních cen
-    df = df[(df['price'] > 100) & (df['price'] < 5000)]
+
+def _wheel_size_numbers(wheel_size):
+    """První číslo z wheel_size jako float (vektorově přes str.extract)."""
+    if pd.api.types.is_numeric_dtype(wheel_size):
+        return wheel_size.astype(float)
+    return wheel_size.astype(str).str.extract(r'(\d+\.?\d*)', expand=False).astype(float)
+
+
+def derive_features(df, wheel_size_median=None):
+    """Feature engineering nad inzeráty, bez filtrace podle ceny (použitelné i pro predikci)."""
+    df = df.copy()
 
     # Explicitní konverze kategoriálních sloupců na string
-    categorical_cols = ['type', 'material', 'suspension_type']
+    categorical_cols = ['type', 'material']
     for col in categorical_cols:
         df[col] = df[col].fillna('missing').astype(str)  # Přidáno ošetření chybějících hodnot
 
@@ -26,20 +42,79 @@ def load_and_preprocess(filepath):
 
     # Feature engineering
     df['suspension_type'] = np.where(df['rear_travel'].fillna(0) > 0, 'full', 'hardtail')  # Ošetření NaN
-    df['year'] = df['title'].str.extract(r'(\d{4})').astype(float)
-    df['age'] = 2025 - df['year'].fillna(2020)  # Imputace chybějících let
+    year = df['title'].str.extract(r'(\d{4})', expand=False).astype(float)
+    df['age'] = 2025 - year.fillna(2020)  # Imputace chybějících let
 
     # Extrakce číselných hodnot z wheel_size
-    df['wheel_size'] = df['wheel_size'].astype(str).apply(
-        lambda x: re.findall(r'\d+\.?\d*', x)[0] if re.findall(r'\d+\.?\d*', x) else np.nan
-    ).astype(float)
-    df['wheel_size'] = df['wheel_size'].fillna(df['wheel_size'].median())  # Imputace mediánem
+    df['wheel_size'] = _wheel_size_numbers(df['wheel_size'])
+    if wheel_size_median is None:
+        wheel_size_median = df['wheel_size'].median()
+    df['wheel_size'] = df['wheel_size'].fillna(wheel_size_median)  # Imputace mediánem
+
+    return df.drop(['title', 'url'], axis=1, errors='ignore')
+
+
+def preprocess_frame(df, wheel_size_median=None):
+    """Předzpracování jednoho DataFrame (celého souboru nebo jednoho chunku)."""
+    # Filtrace extrémních cen
+    df = df[(df['price'] > 100) & (df['price'] < 5000)]
+
+    return derive_features(df, wheel_size_median).dropna(subset=['frame_size', 'wheel_size'])
 
-    return df.drop(['title', 'url', 'year'], axis=1).dropna(subset=['frame_size', 'wheel_size'])
 
+def wheel_size_median_of(filepath, chunksize=100_000):
+    """Medián wheel_size přes celý soubor (po filtraci cen), čte jen dva sloupce."""
+    values = []
+    for chunk in pd.read_csv(filepath, usecols=['price', 'wheel_size'], dtype={'price': 'float32'}, chunksize=chunksize):
+        chunk = chunk[(chunk['price'] > 100) & (chunk['price'] < 5000)]
+        values.append(_wheel_size_numbers(chunk['wheel_size']).dropna().to_numpy(dtype='float32'))
+    values = np.concatenate(values) if values else np.array([], dtype='float32')
+    return float(np.median(values)) if len(values) else np.nan
+
+
+def iter_preprocessed(filepath, chunksize=100_000, wheel_size_median=None):
+    """Streamuje předzpracované chunky ze souboru libovolné velikosti.
+
+    Medián wheel_size se spočítá předem samostatným průchodem, aby
+    imputace dala stejný výsledek jako při načtení celého souboru.
+    """
+    if wheel_size_median is None:
+        wheel_size_median = wheel_size_median_of(filepath, chunksize)
+
+    for chunk in pd.read_csv(filepath, dtype=CSV_DTYPES, usecols=lambda col: col != 'url', chunksize=chunksize):
+        yield preprocess_frame(chunk, wheel_size_median)
+
+
+def load_and_preprocess(filepath, chunksize=None, filters=None, dedup=False):
+    """Načte a předzpracuje CSV s inzeráty, nebo je vybere z listing_store (.db).
+
+    S chunksize se CSV čte po částech, v paměti je vždy jen jeden
+    surový chunk a výsledné (menší) předzpracované sloupce. Z databáze
+    lze přes filters vybrat jen část inzerátů, např. {'type': 'enduro'}.
+    S dedup se před předzpracováním odstraní re-posty téhož kola (dedup.py);
+    shluky duplicit se hledají přes celý soubor, proto nejde s chunksize.
+    """
+    if dedup and chunksize:
+        raise ValueError("dedup potřebuje celý soubor najednou, nelze kombinovat s chunksize")
+
+    if filepath.endswith(('.db', '.sqlite', '.sqlite3')):
+        from listing_store import ListingStore
+        store = ListingStore(filepath)
+        try:
+            df = store.query_listings(filters)
+        finally:
+            store.close()
+    elif chunksize:
+        return pd.concat(iter_preprocessed(filepath, chunksize), ignore_index=True)
+    else:
+        # url je potřeba jen pro výběr nejnovějšího inzerátu ve shluku
+        df = pd.read_csv(filepath, dtype=CSV_DTYPES, usecols=None if dedup else (lambda col: col != 'url'))
+
+    if dedup:
+        from dedup import dedup_listings
+        df = dedup_listings(df)
+    return preprocess_frame(df)
 
-# Načtení a příprava dat
-df = load_and_preprocess('spoj_updated.csv')  # Přidáno volání funkce
 
 # Definice preprocessingu
 numeric_features = ['condition', 'frame_size', 'wheel_size', 'front_travel', 'rear_travel', 'age']
@@ -61,8 +136,12 @@ preprocessor = ColumnTransformer(
         ('cat', categorical_transformer, categorical_features)
     ])
 
-# Kontrola kategorií
-print("\nKontrola kategorií:")
-for col in categorical_features:
-    print(f"\n{col}:")
-    print(df[col].value_counts(dropna=False))
+if __name__ == "__main__":
+    # Načtení a příprava dat
+    df = load_and_preprocess('spoj_updated.csv')  # Přidáno volání funkce
+
+    # Kontrola kategorií
+    print("\nKontrola kategorií:")
+    for col in categorical_features:
+        print(f"\n{col}:")
+        print(df[col].value_counts(dropna=False))
@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from main import derive_features, numeric_features, categorical_features
+
+DEFAULT_MODEL = "bike_price_predictor.pkl"
+
+# Sloupce inzerátu ve formátu spoj_updated.csv, ze kterých derive_features počítá featury
+RAW_LISTING_COLUMNS = ['title', 'type', 'material', 'condition', 'rear_travel', 'wheel_size']
+
+
+def load_model(path=DEFAULT_MODEL):
+    """Načte model jednou pro celý proces (pickle nebo adresář z artifact_store)."""
+    if os.path.isdir(path):
+        from artifact_store import load_artifact
+        return load_artifact(path, verify=False)
+    return joblib.load(path)
+
+
+def model_features(model):
+    """Vstupní sloupce modelu (z fitu), jinak sloupce z main.py."""
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        return list(names)
+    return numeric_features + categorical_features
+
+
+def _numeric_columns(model):
+    """Sloupce, které ColumnTransformer modelu zpracovává jako numerické."""
+    steps = model.named_steps.values() if hasattr(model, 'named_steps') else [model]
+    for step in steps:
+        if isinstance(step, ColumnTransformer):
+            for name, _, columns in step.transformers:
+                if name == 'num':
+                    return list(columns)
+    return list(numeric_features)
+
+
+class FeaturePreparer:
+    """Převádí surové řádky (scraped.csv, inzeráty z main.py) na vstup modelu."""
+
+    def __init__(self, model):
+        self.features = model_features(model)
+        self.numeric = [col for col in _numeric_columns(model) if col in self.features]
+
+    def __call__(self, df):
+        """Chybějící featury doplní z derive_features, jen když má df všechny RAW_LISTING_COLUMNS.
+
+        Jinak (např. neúplný záznam {"year": 2024, "brand": "Canyon"})
+        zůstanou NaN a doplní je imputery modelu.
+        """
+        if (any(col not in df.columns for col in self.features)
+                and all(col in df.columns for col in RAW_LISTING_COLUMNS)):
+            # Surový inzerát ve formátu spoj_updated.csv -> stejný feature engineering jako v main.py
+            df = derive_features(df)
+        df = df.reindex(columns=self.features)
+        for col in self.numeric:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        return df
+
+
+class LatencyStats:
+    """Latence (od přijetí řádku po predikci) a propustnost skórování."""
+
+    def __init__(self):
+        self.latencies = []
+        self.rows = 0
+        self.started = None
+        self._lock = threading.Lock()
+
+    def record(self, latency, rows=1):
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter() - latency
+            self.latencies.extend([latency] * rows)
+            self.rows += rows
+
+    def summary(self):
+        with self._lock:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            elapsed = time.perf_counter() - self.started if self.started is not None else 0.0
+            return {
+                'rows': self.rows,
+                'p50_ms': round(float(np.percentile(latencies, 50)) * 1000, 3),
+                'p99_ms': round(float(np.percentile(latencies, 99)) * 1000, 3),
+                'rows_per_sec': round(self.rows / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+
+
+def predict_frame(model, prepare, df):
+    """Jedno vektorové volání predict nad celou dávkou."""
+    return model.predict(prepare(df))
+
+
+def predict_csv(model, src, out, batch_size=1000, stats=None):
+    """Skóruje CSV stream po dávkách a zapisuje ho s predicted_price."""
+    prepare = FeaturePreparer(model)
+    header = True
+    for chunk in pd.read_csv(src, chunksize=batch_size):
+        received = time.perf_counter()
+        chunk['predicted_price'] = predict_frame(model, prepare, chunk)
+        if stats is not None:
+            stats.record(time.perf_counter() - received, len(chunk))
+        chunk.to_csv(out, header=header, index=False)
+        header = False
+
+
+def predict_jsonl(model, src, out, batch_size=1000, stats=None, comparables=None, k=5):
+    """Skóruje JSONL stream (jeden inzerát na řádek) po mikro-dávkách.
+
+    S indexem z comparables.py dostane každý záznam i k nejpodobnějších
+    historických inzerátů s cenami (vstup pak musí být ve formátu spoj_updated.csv).
+    """
+    prepare = FeaturePreparer(model)
+    batch, arrivals = [], []
+
+    def flush():
+        df = pd.DataFrame(batch)
+        prices = predict_frame(model, prepare, df)
+        neighbours = comparables.query_batch(df, k=k) if comparables is not None else [None] * len(batch)
+        done = time.perf_counter()
+        for record, price, similar, arrived in zip(batch, prices, neighbours, arrivals):
+            record['predicted_price'] = float(price)
+            if similar is not None:
+                record['comparables'] = similar
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if stats is not None:
+                stats.record(done - arrived)
+        out.flush()
+        batch.clear()
+        arrivals.clear()
+
+    for line in src:
+        line = line.strip()
+        if not line:
+            continue
+        batch.append(json.loads(line))
+        arrivals.append(time.perf_counter())
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+
+class MicroBatcher:
+    """Sbírá jednotlivé požadavky do dávek pro vektorové volání predict.
+
+    Dávka se odešle, jakmile má batch_size řádků, nebo po max_delay
+    sekundách od příchodu prvního řádku. Když predikce dávky selže,
+    záznamy se skórují po jednom, takže chybu dostane jen vadný záznam.
+    """
+
+    def __init__(self, model, batch_size=256, max_delay=0.005, stats=None):
+        self.model = model
+        self.prepare = FeaturePreparer(model)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.stats = stats
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Zařadí jeden inzerát, vrací Future s predikovanou cenou."""
+        future = Future()
+        self._queue.put((record, future, time.perf_counter()))
+        return future
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_delay
+            while len(items) < self.batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                prices = predict_frame(self.model, self.prepare, pd.DataFrame([record for record, _, _ in items]))
+            except Exception:
+                self._run_single(items)
+                continue
+
+            done = time.perf_counter()
+            for (_, future, arrived), price in zip(items, prices):
+                future.set_result(float(price))
+                if self.stats is not None:
+                    self.stats.record(done - arrived)
+
+    def _run_single(self, items):
+        """Záznamy dávky po jednom; výjimka se nastaví jen Future vadného záznamu."""
+        for record, future, arrived in items:
+            try:
+                price = float(predict_frame(self.model, self.prepare, pd.DataFrame([record]))[0])
+            except Exception as e:
+                future.set_exception(e)
+                continue
+            future.set_result(price)
+            if self.stats is not None:
+                self.stats.record(time.perf_counter() - arrived)
+
+
+def serve(model, host="127.0.0.1", port=8000, batch_size=256, max_delay=0.005):
+    """Lokální HTTP endpoint: POST /predict (objekt nebo seznam objektů), GET /stats."""
+    stats = LatencyStats()
+    batcher = MicroBatcher(model, batch_size=batch_size, max_delay=max_delay, stats=stats)
+
+    class PredictHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                self._reply(200, stats.summary())
+            else:
+                self._reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._reply(404, {'error': 'not found'})
+                return
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                records = payload if isinstance(payload, list) else [payload]
+                futures = [batcher.submit(record) for record in records]
+                prices = [future.result() for future in futures]
+            except Exception as e:
+                self._reply(400, {'error': str(e)})
+                return
+            self._reply(200, {'predicted_price': prices if isinstance(payload, list) else prices[0]})
+
+        def log_message(self, format, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), PredictHandler)
+    print(f"Predikce na http://{host}:{port}/predict, statistiky na /stats")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        print(json.dumps(stats.summary()), file=sys.stderr)
+
+
+def build_parser(prog=None):
+    """Argumenty predikce; sdílí je predict.py i bikeest predict."""
+    parser = argparse.ArgumentParser(prog=prog, description="Dávková predikce cen kol modelem bike_price_predictor.pkl")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="Pickle modelu nebo adresář artefaktu (models/...)")
+    parser.add_argument("--input", default="-", help="CSV nebo JSONL soubor, '-' = stdin")
+    parser.add_argument("--output", default="-", help="Výstupní soubor, '-' = stdout")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None, help="Formát vstupu (jinak podle přípony)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--serve", action="store_true", help="Spustí lokální HTTP endpoint místo dávkového běhu")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--comparables", help="Index z comparables.py; k nejpodobnějších inzerátů ke každé predikci (jen JSONL)")
+    parser.add_argument("-k", type=int, default=5, help="Počet srovnatelných inzerátů")
+    parser.add_argument("--max-delay-ms", type=float, default=5.0, help="Maximální čekání na naplnění mikro-dávky")
+    return parser
+
+
+def run_predict(args):
+    """Dávková predikce CSV/JSONL nebo HTTP endpoint (--serve) podle argumentů z build_parser."""
+    model = load_model(args.model)
+
+    if args.serve:
+        serve(model, args.host, args.port, batch_size=args.batch_size, max_delay=args.max_delay_ms / 1000)
+    else:
+        input_format = args.format or ("jsonl" if args.input.endswith((".jsonl", ".json")) else "csv")
+        src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+        stats = LatencyStats()
+        try:
+            if input_format == "jsonl":
+                comparables = None
+                if args.comparables:
+                    from comparables import ComparablesIndex
+                    comparables = ComparablesIndex.load(args.comparables)
+                predict_jsonl(model, src, out, batch_size=args.batch_size, stats=stats, comparables=comparables, k=args.k)
+            else:
+                predict_csv(model, src, out, batch_size=args.batch_size, stats=stats)
+        finally:
+            if src is not sys.stdin:
+                src.close()
+            if out is not sys.stdout:
+                out.close()
+        print(json.dumps(stats.summary()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    run_predict(build_parser().parse_args())
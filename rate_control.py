@@ -0,0 +1,194 @@
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+from crawl_metrics import timed
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+def _status(exc):
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None)
+
+
+def is_overload(exc):
+    """429, 5xx nebo timeout: server nestíhá, paralelismus se má snížit."""
+    return _status(exc) in RETRYABLE_STATUS or isinstance(exc, TimeoutError) or 'Timeout' in type(exc).__name__
+
+
+def is_retryable(exc):
+    """Přetížení a přerušená spojení se opakují, ostatní chyby (404, parsování) ne."""
+    return is_overload(exc) or type(exc).__name__ in ('ConnectionError', 'ChunkedEncodingError', 'RemoteDisconnected')
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponenciální backoff s plným jitterem: náhodně 0 až min(cap, base * 2^attempt)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retry_after(exc):
+    """Hodnota hlavičky Retry-After v sekundách, pokud ji server poslal."""
+    response = getattr(exc, 'response', None)
+    value = response.headers.get('Retry-After') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """Token bucket: průměrně `rate` požadavků za sekundu, nárazově až `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """Samostatný token bucket pro každý host."""
+
+    def __init__(self, rate=10.0, burst=None):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        bucket.acquire()
+
+
+class AdaptiveConcurrency:
+    """AIMD limit souběžných požadavků.
+
+    Po každém okně `window` úspěšných požadavků se limit zvýší o 1,
+    pokud medián latence nepřekročí latency_target (jinak se o 1 sníží).
+    Při přetížení (429, 5xx, timeout) se limit vynásobí `decrease`,
+    nejvýš jednou za cooldown sekund, aby dávka souběžných chyb z jedné
+    špičky limit nesrazila až na minimum.
+    """
+
+    def __init__(self, initial=5, minimum=1, maximum=64, latency_target=2.0, window=20, decrease=0.5, cooldown=1.0):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.window = window
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.active = 0
+        self.history = [(0.0, initial)]
+        self._latencies = []
+        self._last_decrease = float('-inf')
+        self._started = time.monotonic()
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+
+    def _set_limit(self, limit):
+        limit = min(self.maximum, max(self.minimum, limit))
+        if int(limit) != int(self.limit):
+            self.history.append((round(time.monotonic() - self._started, 3), int(limit)))
+        self.limit = limit
+
+    def release(self, latency, ok=True, overload=False):
+        with self._cond:
+            self.active -= 1
+            now = time.monotonic()
+            if overload:
+                if now - self._last_decrease >= self.cooldown:
+                    self._set_limit(self.limit * self.decrease)
+                    self._last_decrease = now
+                self._latencies.clear()
+            elif ok:
+                self._latencies.append(latency)
+                if len(self._latencies) >= self.window:
+                    if statistics.median(self._latencies) <= self.latency_target:
+                        self._set_limit(self.limit + 1)
+                    else:
+                        self._set_limit(self.limit - 1)
+                    self._latencies.clear()
+            self._cond.notify_all()
+
+
+class RateController:
+    """Spouští scrapovací funkci pod AIMD limitem, per-host token bucketem a s opakováním.
+
+    Selhání, která jsou přetížením nebo výpadkem spojení, se opakují
+    po jitterovaném exponenciálním backoffu (nebo po Retry-After),
+    nejvýš `retries`-krát; ostatní výjimky projdou hned.
+    """
+
+    def __init__(self, concurrency=None, limiter=None, retries=3, backoff_base=0.5, backoff_cap=30.0, metrics=None):
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.metrics = metrics
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def call(self, func, url):
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                with timed(self.metrics, "rate_wait"):
+                    self.limiter.acquire(url)
+            with timed(self.metrics, "concurrency_wait"):
+                self.concurrency.acquire()
+            start = time.monotonic()
+            try:
+                result = func(url)
+            except Exception as e:
+                overload = is_overload(e)
+                self.concurrency.release(time.monotonic() - start, ok=False, overload=overload)
+                self._count('overloads' if overload else 'errors')
+                if not is_retryable(e) or attempt >= self.retries:
+                    raise
+                delay = max(backoff_delay(attempt, self.backoff_base, self.backoff_cap), retry_after(e) or 0)
+                self._count('retries')
+                attempt += 1
+                with timed(self.metrics, "backoff"):
+                    time.sleep(delay)
+                continue
+            self.concurrency.release(time.monotonic() - start)
+            self._count('requests')
+            return result
+
+    def summary(self):
+        return {
+            'limit': int(self.concurrency.limit),
+            'limit_history': self.concurrency.history[-20:],
+            **self.stats,
+        }
@@ -0,0 +1,104 @@
+import re
+
+# Jeden regex vybere pravidlo podle labelu řádku specifikací
+LABEL_PATTERN = re.compile(r'frame|wheel size|drivetrain|fork|shock')
+
+MM_PATTERN = re.compile(r'(\d+)\s*mm')
+TRAVEL_PATTERN = re.compile(r'(\d+)\s*mm\s+travel')
+OFFSET_PATTERN = re.compile(r'(\d+)\s*mm\s+offset')
+DAMPER_PATTERN = re.compile(r'(grip\d?|fit\d+|charger\d+)')
+SHOCK_SIZE_PATTERN = re.compile(r'(\d+)\s*(?:mm)?\s*x\s*(\d+)\s*mm')
+SHOCK_LENGTH_PATTERN = re.compile(r'(\d+)\s*mm\s+length')
+SHOCK_STROKE_PATTERN = re.compile(r'(\d+)\s*mm\s+stroke')
+
+SUSPENSION_FIELDS = (
+    'fork_brand', 'fork_model', 'fork_travel', 'fork_damper', 'fork_offset',
+    'shock_brand', 'shock_model', 'shock_length', 'shock_stroke'
+)
+
+
+def _mm(pattern, value):
+    """Číslo v mm jako int, nebo None."""
+    match = pattern.search(value)
+    return int(match.group(1)) if match else None
+
+
+def _brand_and_model(value):
+    """Značka je první slovo, model zbytek textu před první čárkou."""
+    words = value.split(None, 1)
+    brand = words[0] if words else None
+    model = None
+    if ',' in value and len(words) > 1:
+        model = words[1].split(',', 1)[0].strip() or None
+    return brand, model
+
+
+def _frame(value, result):
+    result['frame_material'] = 'carbon' if 'carbon' in value else 'aluminium'
+
+
+def _wheel_size(value, result):
+    # Text se ponechává ('29"', '29" 27.5"'), model s ním pracuje jako s kategorií
+    result['wheel_size'] = value
+
+
+def _drivetrain(value, result):
+    words = value.split(None, 1)
+    result['drivetrain_brand'] = words[0] if words else None
+
+
+def _fork(value, result):
+    result['fork_brand'], result['fork_model'] = _brand_and_model(value)
+    result['fork_travel'] = _mm(TRAVEL_PATTERN, value)
+    damper = DAMPER_PATTERN.search(value)
+    result['fork_damper'] = damper.group(1) if damper else None
+    result['fork_offset'] = _mm(OFFSET_PATTERN, value)
+
+
+def _shock(value, result):
+    result['shock_brand'], result['shock_model'] = _brand_and_model(value)
+    size = SHOCK_SIZE_PATTERN.search(value)
+    if size:
+        result['shock_length'] = int(size.group(1))
+        result['shock_stroke'] = int(size.group(2))
+    else:
+        result['shock_length'] = _mm(SHOCK_LENGTH_PATTERN, value)
+        result['shock_stroke'] = _mm(SHOCK_STROKE_PATTERN, value)
+
+
+RULES = {
+    'frame': _frame,
+    'wheel size': _wheel_size,
+    'drivetrain': _drivetrain,
+    'fork': _fork,
+    'shock': _shock,
+}
+
+
+def extract_specs(rows):
+    """Vytěží typované hodnoty z mnoha řádků specifikací najednou.
+
+    rows je iterovatelná kolekce dvojic (label, value). Vrací dict jen
+    s nalezenými poli, délky v mm jsou int. Řádky s neznámým labelem
+    se přeskočí.
+    """
+    result = {}
+    for label, value in rows:
+        if not label or not value:
+            continue
+        match = LABEL_PATTERN.search(label.lower())
+        if match:
+            RULES[match.group(0)](value.strip().lower(), result)
+    return result
+
+
+def extract_specs_batch(pages):
+    """extract_specs pro seznam stránek (každá jako seznam řádků)."""
+    return [extract_specs(rows) for rows in pages]
+
+
+def parse_suspension(label, value):
+    """Zpracování specifikací vidlice a tlumiče z jednoho řádku."""
+    if 'fork' not in label.lower() and 'shock' not in label.lower():
+        return {}
+    return extract_specs([(label, value)])
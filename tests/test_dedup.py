@@ -0,0 +1,49 @@
+"""Deduplikace re-postovaných inzerátů (MinHash + LSH) nad malými ručně sestavenými rámci."""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from dedup import dedup_listings, find_clusters  # noqa: E402
+
+COLUMNS = ['title', 'type', 'condition', 'frame_size', 'wheel_size', 'material',
+           'front_travel', 'rear_travel', 'price', 'url']
+
+
+def listing(title, price, listing_id, frame_size=3):
+    return [title, 'enduro', 2, frame_size, 29.0, 1, 160, 150, price,
+            f"https://www.pinkbike.com/buysell/{listing_id}/"]
+
+
+def test_find_clusters_empty_frame():
+    labels, candidates = find_clusters(pd.DataFrame(columns=COLUMNS))
+    assert len(labels) == 0
+    assert candidates == 0
+
+
+def test_dedup_listings_empty_frame():
+    df = pd.DataFrame(columns=COLUMNS)
+    stats = {}
+    result = dedup_listings(df, stats=stats)
+    assert result.empty
+    assert list(result.columns) == COLUMNS
+    assert stats == {'rows_in': 0, 'rows_out': 0, 'clusters_merged': 0, 'candidate_pairs': 0}
+
+
+def test_dedup_listings_keeps_newest_repost():
+    df = pd.DataFrame([
+        listing("2022 Specialized Enduro Comp", 4200, 3900001),
+        listing("2022 Specialized Enduro Comp - price drop!", 3900, 3950002),
+        # jiná velikost rámu = jiné kolo, i když titulek sedí
+        listing("2022 Specialized Enduro Comp", 4100, 3900003, frame_size=4),
+        listing("2021 Yeti SB150 T2", 5200, 3900004),
+    ], columns=COLUMNS)
+    stats = {}
+    result = dedup_listings(df, stats=stats)
+    assert list(result['url'].str.extract(r'/(\d+)/$', expand=False)) == ['3950002', '3900003', '3900004']
+    assert stats['clusters_merged'] == 1
+    assert np.all(result.columns == df.columns)
@@ -0,0 +1,41 @@
+"""HtmlCache: dekódování uložených bytes podle kódování z odpovědi."""
+import os
+import sqlite3
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from html_cache import HtmlCache  # noqa: E402
+
+URL = "https://mtbdatabase.com/bikes/2023/ibis/exie-deore/"
+HTML = "<h1>Kolo Příbram – 29\"</h1>"
+
+
+def test_raw_bytes_decoded_with_stored_charset(tmp_path):
+    cache = HtmlCache(str(tmp_path))
+    cache.store(URL, HTML.encode("cp1250"), charset="windows-1250")
+    assert cache.get(URL) == HTML
+    assert cache.get(URL, raw=True) == HTML.encode("cp1250")
+    cache.close()
+
+
+def test_str_and_unknown_charset_fall_back_to_utf8(tmp_path):
+    cache = HtmlCache(str(tmp_path))
+    cache.store(URL, HTML)
+    assert cache.get(URL) == HTML
+    cache.store(URL, b"<h1>\xff ok</h1>", charset="neexistuje")
+    assert cache.get(URL) == "<h1>� ok</h1>"
+    cache.close()
+
+
+def test_index_without_charset_column(tmp_path):
+    conn = sqlite3.connect(os.path.join(tmp_path, "index.db"))
+    conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT,"
+                 " last_modified TEXT, fetched_at REAL, validated_at REAL)")
+    conn.close()
+    cache = HtmlCache(str(tmp_path))
+    cache.store(URL, HTML.encode("utf-8"), etag='"v1"')
+    assert cache.lookup(URL)['charset'] is None
+    assert cache.get(URL) == HTML
+    cache.close()
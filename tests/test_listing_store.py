@@ -0,0 +1,35 @@
+"""ListingStore: převod hodnot z CSV na typy sloupců SQLite."""
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from listing_store import ListingStore, _clean  # noqa: E402
+
+SPEC_URL = "https://mtbdatabase.com/bikes/2023/ibis/exie-deore/"
+
+
+@pytest.mark.parametrize("value, sql_type, expected", [
+    ("160mm", 'INTEGER', 160),
+    ("45 mm stroke", 'INTEGER', 45),
+    ("160.0", 'INTEGER', 160),
+    (" 2023 ", 'INTEGER', 2023),
+    ("mm", 'INTEGER', None),
+    ("None", 'INTEGER', None),
+    ("27.5", 'REAL', 27.5),
+    ("n/a", 'REAL', None),
+    (160, 'TEXT', '160'),
+])
+def test_clean(value, sql_type, expected):
+    assert _clean(value, sql_type) == expected
+
+
+def test_upsert_specs_keeps_travel_with_unit(tmp_path):
+    store = ListingStore(str(tmp_path / "bikeest.db"))
+    store.upsert_specs([{'url': SPEC_URL, 'year': '2023', 'fork_travel': '120mm', 'shock_stroke': '45mm'}])
+    specs = store.query_specs()
+    store.close()
+    assert specs.loc[0, ['fork_travel', 'shock_stroke', 'year']].tolist() == [120, 45, 2023]
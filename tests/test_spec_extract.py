@@ -0,0 +1,81 @@
+"""Golden testy extrakce specifikací nad uloženou stránkou fixtures/product_page.html."""
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from html_scraper import parse_product_html  # noqa: E402
+from spec_extract import extract_specs, parse_suspension  # noqa: E402
+
+PRODUCT_URL = "https://mtbdatabase.com/bikes/2023/ibis/exie-deore/"
+
+EXPECTED_SPECS = {
+    'frame_material': 'carbon',
+    'wheel_size': '29"',
+    'drivetrain_brand': 'shimano',
+    'fork_brand': 'fox',
+    'fork_model': '34 step-cast performance',
+    'fork_travel': 120,
+    'fork_damper': 'grip',
+    'fork_offset': 44,
+    'shock_brand': 'fox',
+    'shock_model': 'float dps performance',
+    'shock_length': 190,
+    'shock_stroke': 45,
+}
+
+
+@pytest.fixture(scope="module")
+def product_html():
+    with open(os.path.join(BASE_DIR, "fixtures", "product_page.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_product_html(product_html):
+    page = parse_product_html(product_html)
+    assert page['title'] == 'IBIS EXIE DEORE'
+    assert page['price'] == '$4,999.00'
+    assert page['year'] == '2023'
+    assert page['specs'][0] == ('frame', 'carbon fiber, 100mm travel')
+    assert len(page['specs']) == 7
+
+
+def test_parse_product_html_strainer_matches_full_tree(product_html):
+    assert parse_product_html(product_html) == parse_product_html(product_html, strainer=None)
+    assert parse_product_html(product_html.encode("utf-8")) == parse_product_html(product_html)
+
+
+def test_parse_product_html_without_specifications():
+    assert parse_product_html("<html><body><h1>IBIS EXIE</h1></body></html>") is None
+
+
+def test_extract_specs(product_html):
+    assert extract_specs(parse_product_html(product_html)['specs']) == EXPECTED_SPECS
+
+
+def test_result_from_html(product_html):
+    craw2 = pytest.importorskip("craw2")
+    result = craw2.result_from_html(PRODUCT_URL, product_html)
+    assert list(result) == craw2.FIELDNAMES
+    assert result == {
+        'url': PRODUCT_URL,
+        'title': 'IBIS EXIE DEORE',
+        'price': '$4,999.00',
+        'year': '2023',
+        'brand': 'Ibis',
+        **EXPECTED_SPECS,
+    }
+
+
+@pytest.mark.parametrize("label, value, expected", [
+    ('Fork', 'Fox 36 Factory, GRIP2 160mm travel, 44mm offset',
+     {'fork_brand': 'fox', 'fork_model': '36 factory', 'fork_travel': 160, 'fork_damper': 'grip2', 'fork_offset': 44}),
+    ('Rear Shock', 'RockShox Super Deluxe, 210mm length, 55mm stroke',
+     {'shock_brand': 'rockshox', 'shock_model': 'super deluxe', 'shock_length': 210, 'shock_stroke': 55}),
+    ('Brakes', 'Shimano XT', {}),
+])
+def test_parse_suspension(label, value, expected):
+    assert parse_suspension(label, value) == expected
@@ -0,0 +1,99 @@
+"""Hledání URL přes vyhledávací index proti stubu, který přehrává nahrané odpovědi indexu."""
+import json
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(BASE_DIR, "fixtures")
+sys.path.insert(0, BASE_DIR)
+
+url_crawler = pytest.importorskip("url_crawler")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """GET /bikes/ vrací uložený výpis, POST na index odpověď z fixtures/search_responses.json.
+
+    Nahraná odpověď platí pro dotaz, jehož pole z "request" mají stejné
+    hodnoty a který se stejně jako nahraný ptá (nebo neptá) na facety.
+    """
+
+    listing = b""
+    records = []
+    queries = []
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send(200, self.listing, "text/html; charset=utf-8")
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.queries.append((self.path, query))
+        for record in self.records:
+            request = record["request"]
+            if (all(query.get(key) == value for key, value in request.items())
+                    and ("facets" in request) == ("facets" in query)):
+                self._send(200, json.dumps(record["response"]).encode("utf-8"), "application/json")
+                return
+        self._send(404, b"{}", "application/json")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def search_stub():
+    with open(os.path.join(FIXTURES_DIR, "listing_page.html"), "rb") as f:
+        listing = f.read()
+    with open(os.path.join(FIXTURES_DIR, "search_responses.json"), encoding="utf-8") as f:
+        records = json.load(f)
+    handler = type("Handler", (ReplayHandler,), {"listing": listing, "records": records, "queries": []})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address
+    try:
+        yield f"http://{host}:{port}", handler.queries
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def test_discover_via_search_replays_recorded_responses(search_stub, capsys):
+    endpoint, queries = search_stub
+    base_url = f"{endpoint}/bikes/"
+    links = list(url_crawler.discover_via_search(base_url, endpoint=endpoint))
+
+    assert len(links) == len(set(links))
+    assert set(links) == {
+        f"{endpoint}/bikes/2023/ibis/exie/2023-ibis-exie-deore/",
+        f"{endpoint}/bikes/2023/santa-cruz/blur/2023-santa-cruz-blur-c-s/",
+        f"{endpoint}/bikes/2022/trek/fuel-ex/2022-trek-fuel-ex-8-gen-5/",
+        f"{endpoint}/bikes/2023/yeti/sb160/2023-yeti-sb160-c1/",
+        f"{endpoint}/bikes/2024/yeti/sb160/2024-yeti-sb160-t2/",
+        f"{endpoint}/bikes/2023/orbea/rallon/2023-orbea-rallon-m-team/",
+        f"{endpoint}/bikes/2024/specialized/enduro/2024-specialized-enduro-comp/",
+    }
+    # Přístupové údaje z výpisu, index z parametrů stránkování
+    assert all(path == "/1/indexes/prod_mtbdb/query" for path, _ in queries)
+    # Enduro přesáhlo limit stránkování a rozdělilo se podle roku
+    assert "dělím dotaz podle year" in capsys.readouterr().out
+
+
+def test_search_hits_warns_when_capped_without_split_facets(search_stub, capsys):
+    endpoint, _ = search_stub
+    session = url_crawler.requests.Session()
+    hits = list(url_crawler.search_hits(session, endpoint, "FIXTUREAPPID", "key",
+                                        [["riding_style:enduro"]], split_facets=()))
+
+    assert [hit["objectID"] for hit in hits] == ["301", "302"]
+    assert "Varování: index vrátil jen 2 z 4 hitů" in capsys.readouterr().out
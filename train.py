@@ -0,0 +1,342 @@
+import argparse
+import json
+import math
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Memory
+from sklearn.base import clone
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.metrics import mean_absolute_error, r2_score
+from listing_store import ListingStore
+from main import CSV_DTYPES, preprocess_frame, _wheel_size_numbers, preprocessor, numeric_features, categorical_features
+from entity_resolution import SPEC_FEATURES, SPEC_NUMERIC_FEATURES, SPEC_CATEGORICAL_FEATURES, join_specs
+from ingest import load_specs
+
+# Model nad inzeráty (main.py) má jiné featury než sledovaný bike_price_predictor.pkl
+# (year/brand/frame_material/wheel_size), který predict.py načítá ve výchozím stavu
+DEFAULT_OUTPUT = "listing_price_model.pkl"
+
+PARAM_GRID = [
+    {
+        'regressor': [RandomForestRegressor(random_state=42)],
+        'regressor__n_estimators': [100, 300],
+        'regressor__max_depth': [None, 20],
+        'regressor__min_samples_leaf': [1, 3],
+    },
+    {
+        'regressor': [GradientBoostingRegressor(random_state=42)],
+        'regressor__n_estimators': [200, 400],
+        'regressor__learning_rate': [0.05, 0.1],
+        'regressor__max_depth': [3, 5],
+    },
+    {
+        'regressor': [HistGradientBoostingRegressor(random_state=42)],
+        'regressor__max_iter': [200, 400],
+        'regressor__learning_rate': [0.05, 0.1],
+        'regressor__max_leaf_nodes': [15, 31],
+    },
+]
+
+
+def build_pipeline(cache_dir=None, spec_features=False):
+    """Pipeline(preprocessor z main.py, regresor) s cache fitnutých transformerů.
+
+    Preprocessor vrací hustou matici, aby šel použít i HistGradientBoosting.
+    Se spec_features dostane numerická a kategoriální větev navíc spec_
+    sloupce z entity_resolution.join_specs.
+    """
+    pipeline_preprocessor = clone(preprocessor).set_params(sparse_threshold=0)
+    if spec_features:
+        extra = {'num': SPEC_NUMERIC_FEATURES, 'cat': SPEC_CATEGORICAL_FEATURES}
+        pipeline_preprocessor.set_params(transformers=[
+            (name, transformer, list(columns) + extra[name]) for name, transformer, columns in pipeline_preprocessor.transformers
+        ])
+    return Pipeline(
+        steps=[
+            ('preprocessor', pipeline_preprocessor),
+            ('regressor', RandomForestRegressor(random_state=42)),
+        ],
+        memory=Memory(cache_dir, verbose=0) if cache_dir else None,
+    )
+
+
+def has_spec_features(df):
+    return all(col in df.columns for col in SPEC_FEATURES)
+
+
+def split_features(df):
+    columns = numeric_features + categorical_features + (SPEC_FEATURES if has_spec_features(df) else [])
+    return df[columns], df['price']
+
+
+def read_listings(filepath):
+    """Surové inzeráty včetně url (podle ní se pozná, co už model viděl), z CSV nebo listing_store."""
+    if filepath.endswith(('.db', '.sqlite', '.sqlite3')):
+        store = ListingStore(filepath)
+        try:
+            return store.query_listings()
+        finally:
+            store.close()
+    return pd.read_csv(filepath, dtype=CSV_DTYPES)
+
+
+def row_keys(df):
+    """64bitový hash řádku: podle url, bez ní podle celého řádku."""
+    if 'url' in df.columns:
+        return pd.util.hash_pandas_object(df['url'], index=False).to_numpy()
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def wheel_size_median(df):
+    """Medián wheel_size po filtraci cen, stejně jako v preprocess_frame."""
+    df = df[(df['price'] > 100) & (df['price'] < 5000)]
+    return float(_wheel_size_numbers(df['wheel_size']).median())
+
+
+class TrainingState:
+    """Co už model viděl: hashe řádků a předzpracovaná matice po dávkách.
+
+    Každá aktualizace přidá do root/chunks jednu dávku (keys, X, y), takže
+    zápis je úměrný jen nové deltě. meta.json drží medián wheel_size z
+    plného tréninku a počítadlo aktualizací od poslední kompakce.
+    """
+
+    def __init__(self, root="train_state"):
+        self.root = root
+        self.chunks_dir = os.path.join(root, "chunks")
+        self.meta_path = os.path.join(root, "meta.json")
+
+    def exists(self):
+        return os.path.exists(self.meta_path)
+
+    def load_meta(self):
+        with open(self.meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_meta(self, meta):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+    def _chunk_ids(self):
+        if not os.path.isdir(self.chunks_dir):
+            return []
+        return sorted({name.split("_", 1)[1].split(".")[0] for name in os.listdir(self.chunks_dir) if name.startswith("keys_")})
+
+    def reset(self, keys, X, y, meta):
+        """Nový stav po plném tréninku."""
+        if os.path.isdir(self.chunks_dir):
+            for name in os.listdir(self.chunks_dir):
+                os.remove(os.path.join(self.chunks_dir, name))
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        self.append(keys, X, y)
+        self.save_meta(meta)
+
+    def append(self, keys, X, y):
+        chunk_id = f"{len(self._chunk_ids()) + 1:06d}"
+        # Klíče se zapisují poslední, dávka bez nich se nepočítá jako viděná
+        np.save(os.path.join(self.chunks_dir, f"X_{chunk_id}.npy"), np.asarray(X, dtype=np.float32))
+        np.save(os.path.join(self.chunks_dir, f"y_{chunk_id}.npy"), np.asarray(y, dtype=np.float32))
+        np.save(os.path.join(self.chunks_dir, f"keys_{chunk_id}.npy"), np.asarray(keys, dtype=np.uint64))
+
+    def seen_keys(self):
+        chunks = [np.load(os.path.join(self.chunks_dir, f"keys_{chunk_id}.npy")) for chunk_id in self._chunk_ids()]
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+
+    def matrix(self):
+        """Celá předzpracovaná matice a cílové ceny (pro kompakci)."""
+        ids = self._chunk_ids()
+        X = np.concatenate([np.load(os.path.join(self.chunks_dir, f"X_{chunk_id}.npy")) for chunk_id in ids])
+        y = np.concatenate([np.load(os.path.join(self.chunks_dir, f"y_{chunk_id}.npy")) for chunk_id in ids])
+        return X, y
+
+
+def _dense(X):
+    return X.toarray() if hasattr(X, 'toarray') else X
+
+
+def save_training_state(state, model, raw, X_train, y_train, test_index):
+    """Uloží stav po plném tréninku: za viděné se berou všechny řádky mimo testovací.
+
+    Testovací řádky přidá do modelu až první inkrementální běh.
+    """
+    X_cached = _dense(model[:-1].transform(X_train))
+    meta = {
+        'wheel_size_median': wheel_size_median(raw),
+        'base_n_estimators': getattr(model[-1], 'n_estimators', None),
+        'n_features': int(X_cached.shape[1]),
+        'updates_since_compaction': 0,
+        'rows': int(len(y_train)),
+        'spec_features': has_spec_features(raw),
+    }
+    # Odfiltrované řádky (cena mimo rozsah) se označí také, matice pro ně nemá řádek
+    state.reset(row_keys(raw)[~raw.index.isin(test_index)], X_cached, y_train, meta)
+
+
+def incremental_update(model, state, raw, compact_every=7, min_new_trees=10):
+    """Doučí model jen na řádcích, které ještě neviděl.
+
+    Náhodný les dostane přes warm_start nové stromy natrénované na deltě
+    (počet úměrný podílu nových řádků). Ostatní estimátory se nemění a
+    nové řádky jen čekají v cache. Každých compact_every aktualizací se
+    estimátor přefituje na celé uložené matici, u lesa tím se vrátí
+    i původní počet stromů.
+    """
+    meta = state.load_meta()
+    keys = row_keys(raw)
+    is_new = ~np.isin(keys, state.seen_keys()) & ~pd.Series(keys).duplicated().to_numpy()
+    delta = raw[is_new]
+    summary = {'new_rows': int(is_new.sum()), 'cached_rows': 0, 'trained_rows': 0, 'action': 'none'}
+    if delta.empty:
+        return model, summary
+
+    features = preprocess_frame(delta, meta['wheel_size_median'])
+    X_new, y_new = split_features(features)
+    X_new = _dense(model[:-1].transform(X_new)) if len(features) else np.empty((0, meta['n_features']), dtype=np.float32)
+    state.append(keys[is_new], X_new, y_new)
+    meta['rows'] += len(y_new)
+    meta['updates_since_compaction'] += 1
+    summary['cached_rows'] = int(len(y_new))
+
+    estimator = model[-1]
+    if meta['updates_since_compaction'] >= compact_every:
+        X_all, y_all = state.matrix()
+        estimator = clone(estimator)
+        if isinstance(estimator, RandomForestRegressor):
+            estimator.set_params(n_estimators=meta['base_n_estimators'], warm_start=False)
+        estimator.fit(X_all, y_all)
+        model.steps[-1] = (model.steps[-1][0], estimator)
+        meta['updates_since_compaction'] = 0
+        summary['action'] = 'compaction'
+        summary['trained_rows'] = int(len(y_all))
+    elif isinstance(estimator, RandomForestRegressor) and len(y_new):
+        added = max(min_new_trees, math.ceil(meta['base_n_estimators'] * len(y_new) / meta['rows']))
+        estimator.set_params(warm_start=True, n_estimators=estimator.n_estimators + added)
+        estimator.fit(X_new, y_new)
+        summary['trained_rows'] = int(len(y_new))
+        summary['action'] = f"+{added} stromů"
+
+    state.save_meta(meta)
+    return model, summary
+
+
+def search(X, y, method='halving', cache_dir=None, cv=5, n_jobs=-1):
+    """Hledání hyperparametrů přes successive halving (nebo plný grid pro srovnání)."""
+    pipeline = build_pipeline(cache_dir, has_spec_features(X))
+    if method == 'halving':
+        search_cv = HalvingGridSearchCV(
+            pipeline, PARAM_GRID, cv=cv, scoring='r2', factor=3,
+            resource='n_samples', n_jobs=n_jobs, random_state=42
+        )
+    else:
+        search_cv = GridSearchCV(pipeline, PARAM_GRID, cv=cv, scoring='r2', n_jobs=n_jobs)
+
+    start = time.perf_counter()
+    search_cv.fit(X, y)
+    return search_cv, time.perf_counter() - start
+
+
+def best_per_estimator(search_cv):
+    """Nejlepší parametry pro každý typ regresoru z výsledků hledání."""
+    results = pd.DataFrame(search_cv.cv_results_)
+    if 'iter' in results:
+        # U halvingu porovnáváme jen kandidáty z posledního kola, kam se dostali
+        results = results.sort_values('iter').groupby(results['params'].map(str)).tail(1)
+    results['estimator'] = results['param_regressor'].map(lambda reg: type(reg).__name__)
+    best = results.sort_values('mean_test_score', ascending=False).groupby('estimator').head(1)
+    return {row['estimator']: row['params'] for _, row in best.iterrows()}
+
+
+def evaluate(pipeline, X_train, y_train, X_test, y_test):
+    start = time.perf_counter()
+    pipeline.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    predicted = pipeline.predict(X_test)
+    return {
+        'fit_s': fit_seconds,
+        'r2': r2_score(y_test, predicted),
+        'mae': mean_absolute_error(y_test, predicted),
+    }
+
+
+def run_training(args):
+    """Plný nebo inkrementální trénink podle argumentů CLI (train.py i bikeest train).
+
+    args má atributy data, output, search, cache_dir, cv, jobs,
+    incremental, state_dir, dedup, specs a compact_every.
+    """
+    state = TrainingState(args.state_dir)
+    start = time.perf_counter()
+    raw = read_listings(args.data)
+    if args.dedup:
+        from dedup import dedup_listings
+        dedup_stats = {}
+        raw = dedup_listings(raw, stats=dedup_stats)
+        print(f"Deduplikace: {dedup_stats['rows_in']} -> {dedup_stats['rows_out']} řádků "
+              f"({dedup_stats['clusters_merged']} shluků re-postů)")
+    if args.specs:
+        join_stats = {}
+        raw = join_specs(raw, load_specs(args.specs), stats=join_stats)
+        print(f"Specifikace: spárováno {join_stats['matched']}/{join_stats['listings']} inzerátů "
+              f"({join_stats['listings_per_sec']:,.0f} inzerátů/s)")
+
+    if args.incremental:
+        if not state.exists():
+            raise SystemExit(f"Stav {args.state_dir} neexistuje, nejdřív spusťte plný trénink")
+        if state.load_meta().get('spec_features', False) != bool(args.specs):
+            raise SystemExit("Model byl trénován " + ("s --specs" if not args.specs else "bez --specs") + ", spusťte se stejnými featurami")
+        model, summary = incremental_update(joblib.load(args.output), state, raw, compact_every=args.compact_every)
+        joblib.dump(model, args.output)
+        print(f"Nové řádky: {summary['new_rows']}, do cache {summary['cached_rows']}, trénováno na {summary['trained_rows']}, "
+              f"akce: {summary['action']}, {time.perf_counter() - start:.2f} s")
+        return
+
+    X, y = split_features(preprocess_frame(raw))
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    search_cv, search_seconds = search(X_train, y_train, args.search, args.cache_dir or None, args.cv, args.jobs)
+    best_model = search_cv.best_estimator_
+    time_to_model = time.perf_counter() - start
+
+    best_pred = best_model.predict(X_test)
+    print(f"\nHledání ({args.search}): {search_seconds:.1f} s, model hotový za {time_to_model:.1f} s")
+    print(f"Nejlepší: {search_cv.best_params_}")
+    print(f"Test R² {r2_score(y_test, best_pred):.3f}, MAE {mean_absolute_error(y_test, best_pred):.1f}")
+
+    print(f"\n{'Regresor':<32}{'fit [s]':>10}{'R²':>10}{'MAE':>10}")
+    for name, params in best_per_estimator(search_cv).items():
+        pipeline = build_pipeline(args.cache_dir or None, has_spec_features(X_train)).set_params(**params)
+        scores = evaluate(pipeline, X_train, y_train, X_test, y_test)
+        print(f"{name:<32}{scores['fit_s']:>10.2f}{scores['r2']:>10.3f}{scores['mae']:>10.1f}")
+
+    joblib.dump(best_model, args.output)
+    save_training_state(state, best_model, raw, X_train, y_train, X_test.index)
+    print(f"\nModel uložen do {args.output}, stav tréninku do {args.state_dir}")
+
+
+def build_parser(prog=None):
+    """Argumenty tréninku; sdílí je train.py i bikeest train."""
+    parser = argparse.ArgumentParser(prog=prog, description="Trénink modelu ceny kola nad inzeráty z main.py")
+    parser.add_argument("--data", default="spoj_updated.csv")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Pickle modelu (predict.py --model)")
+    parser.add_argument("--search", choices=["halving", "grid"], default="halving")
+    parser.add_argument("--cache-dir", default=".train_cache", help="Cache fitnutých transformerů ('' = vypnuto)")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="Počet procesů pro křížovou validaci (-1 = všechna jádra)")
+    parser.add_argument("--incremental", action="store_true", help="Doučí uložený model jen na nových řádcích z --data")
+    parser.add_argument("--state-dir", default="train_state", help="Stav inkrementálního tréninku (viděné řádky, cache matice)")
+    parser.add_argument("--dedup", action="store_true", help="Před tréninkem odstraní re-posty téhož kola (dedup.py)")
+    parser.add_argument("--specs", help="Specifikace kol (scraped.csv); spárují se k inzerátům a přidají jako featury")
+    parser.add_argument("--compact-every", type=int, default=7, help="Po kolika inkrementálních aktualizacích přefitovat estimátor")
+    return parser
+
+
+if __name__ == "__main__":
+    run_training(build_parser().parse_args())
@@ -1,3 +1,8 @@
+import argparse
+import os
+import re
+from urllib.parse import urlsplit, parse_qs, urljoin
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -10,6 +15,13 @@ import requests
 from bs4 import BeautifulSoup
 import csv
 from selenium.common.exceptions import TimeoutException  # Add this import
+from driver_pool import DriverPool
+
+BASE_URL = "https://mtbdatabase.com/bikes/"
+SEARCH_INDEX = "prod_mtbdb"  # InstantSearch index z parametrů stránkování
+HIT_URL_FIELDS = ("url", "permalink", "link")
+# Facety, podle kterých se dělí dotaz, jehož hity přesahují limit stránkování indexu
+SPLIT_FACETS = ("year", "brand")
 
 def accept_consent(driver):
     """Přijme consent modal, pokud existuje."""
@@ -36,6 +48,7 @@ def scrape_bike_links(base_url):
     )
 
     all_links = []
+    seen_links = set()  # Rychlá kontrola duplicit, all_links drží pořadí
 
     try:
         driver.get(base_url)
@@ -52,7 +65,8 @@ def scrape_bike_links(base_url):
         bike_cards = driver.find_elements(By.CSS_SELECTOR, "#bike_results_container a")
         for card in bike_cards:
             link = card.get_attribute("href")
-            if link and link.startswith("http") and link not in all_links:
+            if link and link.startswith("http") and link not in seen_links:
+                seen_links.add(link)
                 all_links.append(link)
 
         # Navigace na další stránky (pokud existují)
@@ -68,7 +82,8 @@ def scrape_bike_links(base_url):
                 bike_cards = driver.find_elements(By.CSS_SELECTOR, "#bike_results_container a")
                 for card in bike_cards:
                     link = card.get_attribute("href")
-                    if link and link.startswith("http") and link not in all_links:
+                    if link and link.startswith("http") and link not in seen_links:
+                        seen_links.add(link)
                         all_links.append(link)
             except Exception as e:
                 print("Další stránka nenalezena nebo konec stránek.")
@@ -106,6 +121,26 @@ def save_urls_to_csv(urls, filename="ebike_urls.csv"):
             writer.writerow([url])
     print(f"URL byly úspěšně uloženy do souboru {filename}")
 
+def load_known_urls(filename="ebike_urls.csv"):
+    """Načte už známé URL z existujícího CSV, pokud soubor existuje."""
+    if not os.path.exists(filename):
+        return set()
+    with open(filename, mode="r", newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        next(reader, None)  # Přeskočí hlavičku
+        return {row[0] for row in reader if row}
+
+def append_urls_to_csv(urls, filename="ebike_urls.csv"):
+    """Připíše nové URL na konec CSV souboru (hlavičku jen u nového souboru)."""
+    write_header = not os.path.exists(filename) or os.path.getsize(filename) == 0
+    with open(filename, mode="a", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        if write_header:
+            writer.writerow(["URL"])  # Záhlaví sloupce
+        for url in urls:
+            writer.writerow([url])
+    print(f"{len(urls)} nových URL připsáno do souboru {filename}")
+
 def scrape_all_pages(base_url):
     """Scrapes all bike URLs from all pages of the site."""
     chrome_options = Options()
@@ -197,8 +232,66 @@ def get_riding_style_links(base_url):
 
     return riding_style_links
 
-def scrape_all_pages_for_style(style_url):
+def paginate_style(driver, style_url):
+    """Prochází stránky jednoho stylu jízdy, dokud přibývají nové odkazy.
+
+    Končí na první stránce, která nepřidá žádný odkaz mimo už nalezené
+    v tomto běhu, nebo na stránce kratší než ta první (poslední stránka),
+    takže se nečeká na timeout za koncem výpisu. Už známé URL z CSV
+    stránkování nezastaví: výpis není řazený od nejnovějších, nová kola
+    můžou být na kterékoli stránce.
+    """
+    all_links = set()
+    page_number = 1
+    page_size = None
+
+    while True:
+        # Construct the URL for the current page
+        paginated_url = f"{style_url}&prod_mtbdb%5Bpage%5D={page_number}"
+        print(f"Scraping page {page_number} of {style_url}")
+        driver.get(paginated_url)
+
+        # Wait for bike results to load or break if no results are found
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "#bike_results_container a"))
+            )
+        except TimeoutException:
+            print(f"No bikes found on page {page_number}. Stopping pagination for {style_url}.")
+            break
+
+        # Scrape bike links on the current page
+        page_links = set()
+        bike_cards = driver.find_elements(By.CSS_SELECTOR, "#bike_results_container a")
+        for card in bike_cards:
+            link = card.get_attribute("href")
+            if link and link.startswith("http"):
+                page_links.add(link)
+
+        new_links = page_links - all_links
+        all_links.update(page_links)
+
+        if not new_links:
+            print(f"Page {page_number} added no new bikes. Stopping pagination for {style_url}.")
+            break
+
+        if page_size is None:
+            page_size = len(page_links)
+        elif len(page_links) < page_size:
+            print(f"Page {page_number} is the last page of {style_url}.")
+            break
+
+        # Increment the page number for the next iteration
+        page_number += 1
+
+    return all_links
+
+def scrape_all_pages_for_style(style_url, pool=None):
     """Scrapes all bike URLs for a specific riding style by iterating through pages."""
+    if pool is not None:
+        with pool.driver() as pooled:
+            return list(paginate_style(pooled.driver, style_url))
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--disable-gpu")
@@ -210,67 +303,193 @@ def scrape_all_pages_for_style(style_url):
         options=chrome_options
     )
 
-    all_links = set()
-    page_number = 1
-
     try:
-        while True:
-            # Construct the URL for the current page
-            paginated_url = f"{style_url}&prod_mtbdb%5Bpage%5D={page_number}"
-            print(f"Scraping page {page_number} of {style_url}")
-            driver.get(paginated_url)
-
-            # Wait for bike results to load or break if no results are found
-            try:
-                WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "#bike_results_container a"))
-                )
-            except TimeoutException:
-                print(f"No bikes found on page {page_number}. Stopping pagination for {style_url}.")
-                break
-
-            # Scrape bike links on the current page
-            bike_cards = driver.find_elements(By.CSS_SELECTOR, "#bike_results_container a")
-            for card in bike_cards:
-                link = card.get_attribute("href")
-                if link and link.startswith("http"):
-                    all_links.add(link)
-
-            # Increment the page number for the next iteration
-            page_number += 1
-
+        return list(paginate_style(driver, style_url))
     finally:
         driver.quit()
 
-    return list(all_links)
-
-def scrape_all_riding_styles(base_url):
-    """Scrapes all bike URLs for each riding style."""
+def scrape_all_riding_styles(base_url, max_workers=4):
+    """Scrapes all bike URLs for each riding style, styles run in parallel."""
     riding_style_links = get_riding_style_links(base_url)
     all_bike_links = set()
 
-    for style_link in riding_style_links:
+    def scrape_style(style_link):
         print(f"Scraping riding style: {style_link}")
         try:
-            bike_links = scrape_all_pages_for_style(style_link)
-            all_bike_links.update(bike_links)
+            return scrape_all_pages_for_style(style_link, pool)
         except Exception as e:
             print(f"Error while scraping {style_link}: {e}. Moving to the next riding style.")
+            return []
 
-    return list(all_bike_links)
-
-if __name__ == "__main__":
-    base_url = "https://mtbdatabase.com/bikes/"
-    all_bike_links = scrape_all_riding_styles(base_url)
-
-    print(f"Nalezeno {len(all_bike_links)} odkazů na kola:")
-    for link in all_bike_links:
-        print(link)
+    pool = DriverPool(size=max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for bike_links in executor.map(scrape_style, riding_style_links):
+                all_bike_links.update(bike_links)
+    finally:
+        pool.close()
 
-    # Uložení URL do CSV
-    save_urls_to_csv(all_bike_links)
+    return list(all_bike_links)
 
-    site_url = "https://mtbdatabase.com"
+def find_search_credentials(html):
+    """Najde application id a search-only klíč vyhledávacího indexu v HTML výpisu."""
+    match = re.search(r"algoliasearch\(\s*['\"]([A-Za-z0-9]+)['\"]\s*,\s*['\"]([A-Za-z0-9]+)['\"]", html)
+    if not match:
+        return None, None
+    return match.group(1), match.group(2)
+
+def get_riding_style_links_static(html, base_url):
+    """Odkazy na styly jízdy ze statického HTML (bez prohlížeče)."""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for a_tag in soup.select("#riding_styles_list a[href]"):
+        href = urljoin(base_url, a_tag['href'])
+        if href.startswith("http"):
+            links.append(href)
+    return links
+
+def facet_filters_from_url(style_url, index_name=SEARCH_INDEX):
+    """Převede refinementList parametry z URL stylu jízdy na facetFilters dotazu."""
+    query = parse_qs(urlsplit(style_url).query)
+    pattern = re.compile(rf"^{re.escape(index_name)}\[refinementList\]\[([^\]]+)\]")
+    filters = {}
+    for key, values in query.items():
+        match = pattern.match(key)
+        if match:
+            filters.setdefault(match.group(1), []).extend(values)
+    return [[f"{attribute}:{value}" for value in values] for attribute, values in filters.items()]
+
+def search_hits(session, endpoint, app_id, api_key, facet_filters, index_name=SEARCH_INDEX, hits_per_page=1000, split_facets=SPLIT_FACETS):
+    """Streamuje hity z JSON vyhledávacího indexu po velkých stránkách.
+
+    Index vrátí na jeden dotaz nejvýš tolik hitů, kolik dovolí jeho limit
+    stránkování (nbPages se podle něj zkrátí). Když je nbHits větší než
+    počet vrácených hitů, dotaz se rozdělí podle první facety ze
+    split_facets na dotazy po jejích hodnotách; bez další facety se jen
+    vypíše varování. Hity se pak můžou opakovat, duplicity odstraňuje volající.
+    """
+    query_url = f"{endpoint}/1/indexes/{index_name}/query"
+    headers = {
+        "X-Algolia-Application-Id": app_id,
+        "X-Algolia-API-Key": api_key,
+    }
+
+    def query(**params):
+        response = session.post(query_url, headers=headers, timeout=30, json={
+            "query": "",
+            "facetFilters": facet_filters,
+            "attributesToHighlight": [],
+            **params,
+        })
+        response.raise_for_status()
+        return response.json()
+
+    page = retrieved = 0
+    while True:
+        data = query(page=page, hitsPerPage=hits_per_page, attributesToRetrieve=list(HIT_URL_FIELDS))
+        hits = data.get("hits", [])
+        retrieved += len(hits)
+        yield from hits
+
+        page += 1
+        if page >= data.get("nbPages", 0):
+            break
+
+    nb_hits = data.get("nbHits")
+    if nb_hits is None or retrieved >= nb_hits:
+        return
+    values = {}
+    if split_facets:
+        facet = split_facets[0]
+        values = query(hitsPerPage=0, facets=[facet], maxValuesPerFacet=1000).get("facets", {}).get(facet, {})
+    if not values:
+        print(f"Varování: index vrátil jen {retrieved} z {nb_hits} hitů pro {facet_filters}, zbytek je za limitem stránkování")
+        return
+    print(f"Index vrátil {retrieved} z {nb_hits} hitů pro {facet_filters}, dělím dotaz podle {facet} ({len(values)} hodnot)")
+    for value in values:
+        yield from search_hits(session, endpoint, app_id, api_key, facet_filters + [[f"{facet}:{value}"]],
+                               index_name, hits_per_page, split_facets[1:])
+
+def hit_url(hit, base_url):
+    """Absolutní URL kola z jednoho hitu vyhledávání."""
+    for field in HIT_URL_FIELDS:
+        value = hit.get(field)
+        if value:
+            return urljoin(base_url, value)
+    return None
+
+def discover_via_search(base_url, endpoint=None, app_id=None, api_key=None, hits_per_page=1000):
+    """Najde URL kol přímo přes JSON backend výpisu místo renderovaného stránkování.
+
+    Pro každý styl jízdy pošle dotaz s facet filtrem z jeho URL a
+    průběžně vrací (yield) URL kol bez duplicit.
+    """
+    session = requests.Session()
+    html = session.get(base_url, timeout=30).text
+
+    if not (app_id and api_key):
+        app_id, api_key = find_search_credentials(html)
+        if not (app_id and api_key):
+            raise ValueError("Přístupové údaje k vyhledávacímu indexu nebyly ve stránce nalezeny")
+    endpoint = (endpoint or f"https://{app_id}-dsn.algolia.net").rstrip("/")
+
+    riding_style_links = get_riding_style_links_static(html, base_url) or get_riding_style_links(base_url)
+
+    seen_links = set()
+    for style_link in riding_style_links:
+        print(f"Dotaz na index pro styl jízdy: {style_link}")
+        for hit in search_hits(session, endpoint, app_id, api_key, facet_filters_from_url(style_link), hits_per_page=hits_per_page):
+            link = hit_url(hit, base_url)
+            if link and link not in seen_links:
+                seen_links.add(link)
+                yield link
+
+def build_parser(prog=None):
+    """Argumenty hledání URL; sdílí je url_crawler.py i bikeest discover."""
+    parser = argparse.ArgumentParser(prog=prog, description="Hledání URL kol na mtbdatabase.com")
+    parser.add_argument("--output", default="ebike_urls.csv")
+    parser.add_argument("--base-url", default=BASE_URL, help="Výpis kol (např. lokální stub v benchmark.py)")
+    parser.add_argument("--workers", type=int, default=4, help="Počet stylů jízdy procházených paralelně")
+    parser.add_argument("--full", action="store_true", help="Projde vše a soubor přepíše místo připsání nových URL")
+    parser.add_argument("--source", choices=["browser", "search"], default="browser",
+                        help="browser = renderované stránkování, search = přímé dotazy na JSON vyhledávací index")
+    parser.add_argument("--search-endpoint", help="Jiný endpoint indexu (např. lokální stub s nahranými odpověďmi)")
+    parser.add_argument("--search-app-id", default=os.environ.get("MTBDB_SEARCH_APP_ID"))
+    parser.add_argument("--search-api-key", default=os.environ.get("MTBDB_SEARCH_API_KEY"))
+    return parser
+
+def run_discover(args):
+    """Najde URL kol podle argumentů z build_parser a uloží je (s --full přepíše) do args.output."""
+    def discover():
+        if args.source == "search":
+            return list(discover_via_search(args.base_url, args.search_endpoint, args.search_app_id, args.search_api_key))
+        return scrape_all_riding_styles(args.base_url, max_workers=args.workers)
+
+    if args.full:
+        all_bike_links = discover()
+
+        print(f"Nalezeno {len(all_bike_links)} odkazů na kola:")
+        for link in all_bike_links:
+            print(link)
+
+        # Uložení URL do CSV
+        save_urls_to_csv(all_bike_links, args.output)
+    else:
+        # Inkrementální běh: výpis se projde celý, zapíšou se jen nové URL
+        known_links = load_known_urls(args.output)
+        all_bike_links = discover()
+        new_links = sorted(set(all_bike_links) - known_links)
+
+        print(f"Nalezeno {len(new_links)} nových odkazů na kola:")
+        for link in new_links:
+            print(link)
+
+        append_urls_to_csv(new_links, args.output)
+
+    site_url = urljoin(args.base_url, "/")
     urls = get_all_urls_from_site(site_url)
     for url in urls:
         print(url)
+
+if __name__ == "__main__":
+    run_discover(build_parser().parse_args())